@@ -0,0 +1,87 @@
+"""
+Benchmark for compressed responses (GET /api/console-data and GET /).
+
+Compares bytes on the wire and time per request for the uncompressed
+response, the app wrapped in Starlette's GZipMiddleware (which compresses
+every response again) and the EncodedBody variants that are compressed once
+per snapshot version / once at startup. Requests go through the ASGI app,
+full GETs without If-None-Match.
+
+Run from the app directory:
+    python benchmarks/bench_compression.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ.setdefault("MESSAGE_MAX_ROWS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from starlette.middleware.gzip import GZipMiddleware  # noqa: E402
+
+import main  # noqa: E402
+from main import ConsoleDataPayload, Message, Origin, SessionLocal  # noqa: E402
+
+SIZES = [1000, 5000]
+REQUESTS = 50
+
+
+def seed(size):
+    db = SessionLocal()
+    try:
+        db.query(Message).delete()
+        db.query(Origin).delete()
+        db.commit()
+        main.process_incoming_data(ConsoleDataPayload(meta={}, data={"messages": [
+            {"app_name": f"App{i % 40}", "carrier": f"23672{i:06d}XXX",
+             "sms": f"Your verification code is {i}", "time": f"{i} minutes ago"}
+            for i in range(size)
+        ]}), db)
+    finally:
+        db.close()
+
+
+async def per_request(app, path, accept_encoding):
+    """ms per request and the encoded body size"""
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Accept-Encoding": accept_encoding}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path, headers=headers)
+        size = int(response.headers["content-length"])
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200
+        return (time.perf_counter() - start) / REQUESTS * 1000, size
+
+
+async def main_bench():
+    gzip_app = GZipMiddleware(main.app, minimum_size=main.COMPRESSION_MIN_SIZE)
+    cases = [("identity", main.app, "identity"), ("gzip middleware", gzip_app, "gzip")]
+    cases += [(f"cached {encoding}", main.app, encoding) for encoding in main.CONTENT_ENCODINGS]
+
+    print("=" * 66)
+    print(f"COMPRESSED RESPONSES (ms per request, {REQUESTS} requests, KiB sent)")
+    print("=" * 66)
+    print(f"{'path':>18} {'rows':>6} {'response':>16} {'ms':>9} {'KiB':>9}")
+    runs = [("/api/console-data", size) for size in SIZES] + [("/", "-")]
+    for path, size in runs:
+        if size != "-":
+            seed(size)
+        for name, app, accept_encoding in cases:
+            main.RESPONSE_COMPRESSION = app is main.app and accept_encoding != "identity"
+            ms, sent = await per_request(app, path, accept_encoding)
+            print(f"{path:>18} {size:>6} {name:>16} {ms:>9.2f} {sent / 1024:>9.1f}")
+    main.RESPONSE_COMPRESSION = True
+    if main.brotli is None:
+        print("brotli not installed, only gzip was measured")
+    print("=" * 66)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_bench())
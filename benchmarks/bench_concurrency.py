@@ -0,0 +1,149 @@
+"""
+Latency benchmark for GET /api/console-data under concurrent polling.
+
+200 dashboard pollers request `?since=` deltas every 2 seconds while a writer
+posts message batches and a second process periodically holds the SQLite
+write lock (a slow commit), for each way the endpoints can reach the database:
+
+    inline      sync SQLAlchemy called directly in the event loop (old behavior)
+    threadpool  sync helpers run in the threadpool (the default)
+    async       aiosqlite engine through AsyncSession.run_sync (DB_ASYNC=1)
+
+Run from the app directory:
+    python benchmarks/bench_concurrency.py
+"""
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ.setdefault("MESSAGE_MAX_ROWS", "0")
+# Create the async engine too, the threadpool mode switches it off
+os.environ.setdefault("DB_ASYNC", "1")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+
+import main  # noqa: E402
+
+POLLERS = 200
+POLL_INTERVAL = 2.0
+DURATION = 10.0
+WRITE_BATCH = 20
+WRITE_INTERVAL = 1.0
+# Another process holding the write lock, like a slow commit on a busy disk
+LOCK_HOLD = 0.2
+LOCK_INTERVAL = 1.0
+
+
+def hold_write_lock(stop):
+    """Take the write lock from a separate connection every LOCK_INTERVAL"""
+    conn = sqlite3.connect(os.environ["DATABASE_URL"][len("sqlite:///"):], isolation_level=None)
+    while not stop.wait(LOCK_INTERVAL):
+        conn.execute("BEGIN IMMEDIATE")
+        time.sleep(LOCK_HOLD)
+        conn.execute("COMMIT")
+    conn.close()
+
+
+async def run_db_inline(fn):
+    return main._call_with_session(fn)
+
+
+def payload(batch):
+    return {
+        "meta": {"status": "success"},
+        "data": {
+            "messages": [
+                {
+                    "app_name": f"App{i % 10}",
+                    "carrier": f"{batch}-{i}",
+                    "sms": f"Your code is {batch}-{i}",
+                    "time": "now",
+                }
+                for i in range(WRITE_BATCH)
+            ]
+        },
+    }
+
+
+async def run_mode(run):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start_cursor = await run_db_inline(lambda db: db.query(func.max(main.Message.id)).scalar())
+        latencies = []
+        deadline = time.perf_counter() + DURATION
+
+        async def poller(offset):
+            # Like the dashboard after its first load: delta polls with a cursor.
+            # Latency is measured from the scheduled send time, so a blocked
+            # event loop that delays the send itself is counted too
+            cursor = start_cursor
+            scheduled = time.perf_counter() + offset
+            while scheduled < deadline:
+                await asyncio.sleep(max(scheduled - time.perf_counter(), 0))
+                response = await client.get("/api/console-data", params={"since": cursor})
+                latencies.append(time.perf_counter() - scheduled)
+                cursor = response.json()["data"]["cursor"]
+                scheduled += POLL_INTERVAL
+
+        async def writer():
+            batch = 0
+            while time.perf_counter() < deadline:
+                await client.post("/api/console-data", json=payload(f"{run}-{batch}"))
+                batch += 1
+                await asyncio.sleep(WRITE_INTERVAL)
+            return batch
+
+        stop = threading.Event()
+        lock_holder = threading.Thread(target=hold_write_lock, args=(stop,))
+        lock_holder.start()
+        try:
+            results = await asyncio.gather(
+                writer(), *(poller(i * POLL_INTERVAL / POLLERS) for i in range(POLLERS))
+            )
+        finally:
+            stop.set()
+            lock_holder.join()
+        return latencies, results[0]
+
+
+async def main_bench():
+    modes = [("inline", run_db_inline, main.AsyncSessionLocal)]
+    modes.append(("threadpool", main.run_db, None))
+    if main.AsyncSessionLocal is not None:
+        modes.append(("async", main.run_db, main.AsyncSessionLocal))
+    else:
+        print("aiosqlite not installed, skipping the async engine")
+
+    # Seed some history so reads are not trivially empty
+    await run_db_inline(lambda db: main.process_incoming_data(
+        main.ConsoleDataPayload(**payload("seed")), db
+    ))
+
+    print("=" * 60)
+    print(f"CONCURRENT POLLING ({POLLERS} pollers, {WRITE_BATCH} messages posted every {WRITE_INTERVAL}s)")
+    print("=" * 60)
+    print(f"{'mode':>12} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'writes':>8}")
+    run_db = main.run_db
+    for name, runner, async_sessions in modes:
+        main.run_db = runner
+        main.AsyncSessionLocal = async_sessions
+        latencies, writes = await run_mode(name)
+        latencies.sort()
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"{name:>12} {len(latencies) / DURATION:>10,.0f} {p50:>10.1f} {p99:>10.1f} {writes:>8}")
+    main.run_db = run_db
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_bench())
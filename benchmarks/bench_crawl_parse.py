@@ -0,0 +1,112 @@
+"""
+Benchmark for the crawler parse stage (LoginUrlCrawler parse_workers).
+
+A stub search server (separate process) returns a large results page for
+every app. The crawler crawls a batch of apps with pages parsed in the event
+loop (parse_workers=0) or in a process pool, while a ticker measures how late
+the event loop runs a 10 ms timer, i.e. how long parsing blocks other work
+such as API requests.
+
+Run from the app directory:
+    python benchmarks/bench_crawl_parse.py
+"""
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawler  # noqa: E402
+
+APPS = 60
+RESULTS_PER_PAGE = 1500
+PARSE_WORKERS = [0, 1, 2, 4]
+TICK = 0.01
+
+
+def results_page():
+    parts = ["<html><body>"]
+    for i in range(RESULTS_PER_PAGE):
+        parts.append(
+            f'<div class="g"><a href="https://www.example{i}.com/review-{i}"><h3>Result {i}</h3></a>'
+            f'<span>Snippet {i} &amp; more text about nothing in particular</span></div>'
+        )
+    return ("".join(parts) + "</body></html>").encode()
+
+
+def serve(port_queue):
+    body = results_page()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_HEAD(self):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+async def run(base, parse_workers):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    crawler_ = crawler.LoginUrlCrawler(
+        max_concurrency=20, per_host_concurrency=20, parse_workers=parse_workers,
+        search_url=base + "/search?q={query}", candidate_urls=[base + "/{app}/login"],
+    )
+    async with crawler_:
+        # Warm up the client and the worker processes
+        await crawler_.find_login_url("warmup")
+        tick = asyncio.ensure_future(ticker())
+        start = time.perf_counter()
+        results = await asyncio.gather(*(crawler_.find_login_url(f"App{i}") for i in range(APPS)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await tick
+    assert len(results) == APPS
+    return APPS / elapsed, max(lags) * 1000
+
+
+def main_bench():
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(port_queue,), daemon=True)
+    server.start()
+    base = f"http://127.0.0.1:{port_queue.get()}"
+    page_kib = len(results_page()) / 1024
+
+    print("=" * 60)
+    print(f"CRAWL PARSE STAGE ({APPS} apps, {page_kib:,.0f} KiB pages, {os.cpu_count()} CPUs)")
+    print("=" * 60)
+    print(f"{'parse workers':>14} {'crawls/s':>12} {'max loop lag ms':>18}")
+    try:
+        for workers in PARSE_WORKERS:
+            rate, lag = asyncio.run(run(base, workers))
+            print(f"{workers:>14} {rate:>12,.1f} {lag:>18,.1f}")
+    finally:
+        server.terminate()
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,140 @@
+"""
+Benchmark for POST /api/console-data ingestion.
+
+Compares the old write path (one Message ORM object + db.add per message)
+with process_incoming_data (dedup key upsert, single executemany insert,
+expiry and origin upsert). The GET snapshot rebuild that follows a write is
+timed on its own and not counted as ingest time. Each size reports the best
+of REPEATS runs after a warm-up run.
+
+Run from the app directory:
+    python benchmarks/bench_ingest.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Use a throwaway database so app.db is never touched
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ.setdefault("MESSAGE_MAX_ROWS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from main import ConsoleDataPayload, Message, MessageKey, Origin, SessionLocal  # noqa: E402
+
+SIZES = [100, 1000, 10000]
+REPEATS = 5
+APP_NAMES = ["Facebook", "Google", "WhatsApp", "Telegram", "TikTok", "Amazon", "PayPal", "Netflix"]
+
+
+def make_payload(count, run):
+    """Build a payload with `count` unique messages"""
+    return ConsoleDataPayload(
+        meta={"status": "success"},
+        data={
+            "messages": [
+                {
+                    "app_name": APP_NAMES[i % len(APP_NAMES)],
+                    "carrier": f"23672{i:04d}XXX",
+                    "sms": f"Your verification code is {run}-{i}",
+                    "time": f"{i} minutes ago",
+                }
+                for i in range(count)
+            ]
+        },
+    )
+
+
+def legacy_ingest(payload, db):
+    """The previous write path: one ORM object and one db.add per message"""
+    base_time = datetime.utcnow()
+    unique_origins = set()
+    for i, msg in enumerate(payload.data.messages):
+        app_name = msg.app_name
+        color = msg.color or main.get_color_for_app(app_name)
+        unique_origins.add((app_name, color))
+        db.add(Message(
+            app_name=app_name,
+            carrier=msg.carrier,
+            sms=msg.sms,
+            time=msg.time,
+            color=color,
+            created_at=base_time + timedelta(seconds=i),
+        ))
+    for app_name, color in unique_origins:
+        existing_origin = db.query(Origin).filter(Origin.app_name == app_name).first()
+        if not existing_origin:
+            db.add(Origin(app_name=app_name, color=color))
+        else:
+            existing_origin.color = color
+            existing_origin.updated_at = datetime.utcnow()
+    db.commit()
+
+
+def reset_tables():
+    db = SessionLocal()
+    try:
+        db.query(Message).delete()
+        db.query(MessageKey).delete()
+        db.query(Origin).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+class TimedRefresh:
+    """Wraps console_snapshot.refresh and adds up the time spent in it"""
+
+    def __init__(self, refresh):
+        self.refresh = refresh
+        self.elapsed = 0.0
+
+    def __call__(self, db):
+        start = time.perf_counter()
+        try:
+            return self.refresh(db)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+
+def measure(ingest, size, run):
+    """Seconds spent ingesting one payload and rebuilding the snapshot"""
+    reset_tables()
+    payload = make_payload(size, run)
+    timed_refresh = main.console_snapshot.refresh = TimedRefresh(main.console_snapshot.refresh)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        ingest(payload, db)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+        main.console_snapshot.refresh = timed_refresh.refresh
+    return elapsed - timed_refresh.elapsed, timed_refresh.elapsed
+
+
+def best_of(ingest, size, name):
+    """Best ingest time and the snapshot rebuild time of that run"""
+    measure(ingest, size, f"{name}-warmup")
+    return min(measure(ingest, size, f"{name}{repeat}") for repeat in range(REPEATS))
+
+
+def main_bench():
+    print("=" * 66)
+    print(f"INGEST BENCHMARK (rows/sec, higher is better, best of {REPEATS})")
+    print("=" * 66)
+    print(f"{'messages':>10} {'legacy':>12} {'ingest':>12} {'speedup':>9} {'snapshot ms':>13}")
+    for size in SIZES:
+        legacy, _ = best_of(legacy_ingest, size, f"l{size}-")
+        ingest, refresh = best_of(main.process_incoming_data, size, f"b{size}-")
+        print(f"{size:>10} {size / legacy:>12,.0f} {size / ingest:>12,.0f} "
+              f"{legacy / ingest:>8.1f}x {refresh * 1000:>13.1f}")
+    print("=" * 66)
+    print("snapshot ms: rebuilding the GET snapshot after the write, not in the ingest rate")
+
+
+if __name__ == "__main__":
+    main_bench()
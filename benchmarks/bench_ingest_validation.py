@@ -0,0 +1,102 @@
+"""
+Benchmark for request body validation in POST /api/console-data.
+
+Compares the old path (json.loads of the body, then the Dict[str, Any]
+payload model, with every message read back through dict lookups), the typed
+ConsoleDataPayload / MessageItem models validated from the json.loads tree
+(what FastAPI does for a body parameter) and main.parse_console_payload (the
+raw bytes validated straight into the typed models). Reports time and
+tracemalloc peak per payload; normalization and the database write are not
+included. The untyped path is cheaper because it checks nothing per message.
+
+Run from the app directory:
+    python benchmarks/bench_ingest_validation.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel  # noqa: E402
+
+import main  # noqa: E402
+
+SIZES = [1000, 10000, 50000]
+ROUNDS = 5
+
+
+class LegacyPayload(BaseModel):
+    """The previous request model: data was an untyped dict"""
+    meta: Dict[str, Any]
+    data: Dict[str, Any]
+    message: str = None
+
+
+def make_body(count):
+    return json.dumps({
+        "meta": {"status": "success", "timestamp": "2024-01-01T00:00:00"},
+        "data": {"messages": [
+            {"app_name": f"App{i % 50}", "carrier": f"23672{i:06d}XXX",
+             "sms": f"Your verification code is {i}", "time": f"{i} minutes ago"}
+            for i in range(count)
+        ]},
+    }).encode()
+
+
+def legacy_parse(body):
+    payload = LegacyPayload(**json.loads(body))
+    return [
+        (msg.get("app_name", "Unknown"), msg.get("carrier", ""), msg.get("sms", ""), msg.get("time", ""))
+        for msg in payload.data["messages"]
+    ]
+
+
+def typed_dict_parse(body):
+    payload = main.ConsoleDataPayload.model_validate(json.loads(body))
+    return [(msg.app_name, msg.carrier, msg.sms, msg.time) for msg in payload.data.messages]
+
+
+def typed_parse(body):
+    payload = main.parse_console_payload(body)
+    return [(msg.app_name, msg.carrier, msg.sms, msg.time) for msg in payload.data.messages]
+
+
+def measure(fn, body):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(body)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    fn(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best * 1000, peak / 1024 / 1024
+
+
+def main_bench():
+    print("=" * 84)
+    print(f"INGEST VALIDATION (ms per payload, best of {ROUNDS}, and peak MiB)")
+    print("=" * 84)
+    print(f"{'messages':>9} {'body KiB':>9} {'untyped':>9} {'via dict':>9} {'direct':>9} "
+          f"{'untyped MiB':>12} {'dict MiB':>9} {'direct MiB':>11}")
+    for size in SIZES:
+        body = make_body(size)
+        assert legacy_parse(body) == typed_dict_parse(body) == typed_parse(body)
+        legacy_ms, legacy_mib = measure(legacy_parse, body)
+        dict_ms, dict_mib = measure(typed_dict_parse, body)
+        typed_ms, typed_mib = measure(typed_parse, body)
+        print(f"{size:>9} {len(body) / 1024:>9,.0f} {legacy_ms:>9.1f} {dict_ms:>9.1f} {typed_ms:>9.1f} "
+              f"{legacy_mib:>12.1f} {dict_mib:>9.1f} {typed_mib:>11.1f}")
+    print("=" * 84)
+
+
+if __name__ == "__main__":
+    main_bench()
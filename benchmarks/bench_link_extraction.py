@@ -0,0 +1,110 @@
+"""
+Benchmark for login link extraction from a search results page.
+
+Compares the old extraction (full BeautifulSoup tree, then find_all('a'))
+with crawler.find_login_link (streaming HTMLParser scan that only handles
+start tags and stops after the first match). Reports throughput and the
+tracemalloc peak of one extraction, for small and large pages with the login
+link early, late or missing.
+
+Run from the app directory (needs requirements-dev.txt):
+    python benchmarks/bench_link_extraction.py
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import crawler  # noqa: E402
+
+APP_NAME = "Acme"
+DURATION = 1.0
+CASES = [
+    # (results per page, position of the login link, None = not on the page)
+    (100, 0.1),
+    (100, 0.9),
+    (100, None),
+    (2000, 0.1),
+    (2000, 0.9),
+    (2000, None),
+]
+
+
+def sample_page(results, login_at):
+    """Results page with scripts, styles and nested markup around each link"""
+    login_index = None if login_at is None else int(results * login_at)
+    parts = [
+        "<html><head><style>" + ".g{margin:0}" * 200 + "</style>"
+        "<script>" + "var x=1;" * 500 + "</script></head><body><div id=\"search\">"
+    ]
+    for i in range(results):
+        if i == login_index:
+            href = f"/url?q=https://accounts.{APP_NAME.lower()}.com/&sa=U&ved={i}"
+        else:
+            href = f"https://www.example{i}.com/articles/{APP_NAME.lower()}-review-{i}"
+        parts.append(
+            f'<div class="g" data-ved="{i}"><div class="r"><a href="{href}" ping="/ping?i={i}">'
+            f'<h3>Result {i} about {APP_NAME}</h3></a></div>'
+            f'<div class="s"><span class="st">Snippet {i} with <em>{APP_NAME}</em> and some text '
+            f'&amp; entities &middot; more words here</span></div></div>'
+        )
+    parts.append("</div></body></html>")
+    return "".join(parts)
+
+
+def soup_find(html, app_name):
+    """The previous extraction: build the whole tree, then scan every link"""
+    soup = BeautifulSoup(html, 'html.parser')
+    pattern = crawler.login_link_pattern(app_name)
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if pattern.search(href):
+            if 'google.com/url?q=' in href:
+                href = href.split('google.com/url?q=')[1].split('&')[0]
+            return href
+    return None
+
+
+def throughput(fn, html):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        fn(html, APP_NAME)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def peak_memory(fn, html):
+    tracemalloc.start()
+    fn(html, APP_NAME)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main_bench():
+    print("=" * 78)
+    print("LOGIN LINK EXTRACTION (pages/sec and peak KiB per page)")
+    print("=" * 78)
+    print(f"{'results':>8} {'login':>6} {'page KiB':>9} {'soup/s':>9} {'stream/s':>9} "
+          f"{'speedup':>8} {'soup KiB':>9} {'stream KiB':>10}")
+    for results, login_at in CASES:
+        html = sample_page(results, login_at)
+        assert soup_find(html, APP_NAME) == crawler.find_login_link(html, APP_NAME)
+        soup_rate = throughput(soup_find, html)
+        stream_rate = throughput(crawler.find_login_link, html)
+        position = "none" if login_at is None else f"{login_at:.0%}"
+        print(
+            f"{results:>8} {position:>6} {len(html) / 1024:>9,.0f} {soup_rate:>9,.1f} {stream_rate:>9,.1f} "
+            f"{stream_rate / soup_rate:>7.1f}x {peak_memory(soup_find, html):>9,.0f} "
+            f"{peak_memory(crawler.find_login_link, html):>10,.0f}"
+        )
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,103 @@
+"""
+Benchmark for login link matching on a search results page.
+
+Compares the old matcher (five regexes built from the app name on every
+call, nested loop of re.search over every link x every pattern) with
+crawler.login_link_pattern (one alternation compiled once per app and
+cached, single pass over the links). The sample page is a synthetic results
+page shaped like a real one: a few hundred links, the login link near the end.
+
+Run from the app directory (needs requirements-dev.txt):
+    python benchmarks/bench_login_links.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import crawler  # noqa: E402
+
+APPS = [f"App{i}" for i in range(200)]
+LINKS = 300
+ROUNDS = 5
+
+
+def sample_page(app_name):
+    """Results page with LINKS links, the login link at 80% of the page"""
+    links = []
+    for i in range(LINKS):
+        if i == int(LINKS * 0.8):
+            href = f"/url?q=https://accounts.{app_name.lower()}.com/&sa=U&ved={i}"
+        elif i % 3 == 0:
+            href = f"/search?q={app_name}+login&start={i}"
+        else:
+            href = f"https://www.example{i}.com/articles/{app_name.lower()}-review-{i}"
+        links.append(f'<div class="g"><a href="{href}"><h3>Result {i}</h3></a><span>snippet {i}</span></div>')
+    return "<html><body>" + "".join(links) + "</body></html>"
+
+
+def legacy_match(hrefs, app_name):
+    """The previous matcher: patterns built per call, every link x every pattern"""
+    login_patterns = [
+        r'https?://[^/]*' + re.escape(app_name.lower()) + r'[^/]*/login',
+        r'https?://[^/]*' + re.escape(app_name.lower()) + r'[^/]*/signin',
+        r'https?://[^/]*' + re.escape(app_name.lower()) + r'[^/]*/auth',
+        r'https?://accounts\.' + re.escape(app_name.lower()),
+        r'https?://login\.' + re.escape(app_name.lower()),
+    ]
+    for href in hrefs:
+        for pattern in login_patterns:
+            if re.search(pattern, href, re.IGNORECASE):
+                return href
+    return None
+
+
+def bank_match(hrefs, app_name):
+    pattern = crawler.login_link_pattern(app_name)
+    for href in hrefs:
+        if pattern.search(href):
+            return href
+    return None
+
+
+def legacy_find(html, app_name):
+    soup = BeautifulSoup(html, 'html.parser')
+    return legacy_match([link['href'] for link in soup.find_all('a', href=True)], app_name)
+
+
+def measure(fn, inputs):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for args in inputs:
+            assert fn(*args)
+    return ROUNDS * len(inputs) / (time.perf_counter() - start)
+
+
+def main_bench():
+    pages = {app: sample_page(app) for app in APPS}
+    hrefs = [
+        ([link['href'] for link in BeautifulSoup(pages[app], 'html.parser').find_all('a', href=True)], app)
+        for app in APPS
+    ]
+    html = [(pages[app], app) for app in APPS]
+
+    print("=" * 60)
+    print(f"LOGIN LINK MATCHING ({len(APPS)} apps, {LINKS} links/page, pages/sec)")
+    print("=" * 60)
+    print(f"{'stage':>18} {'legacy':>12} {'bank':>12} {'speedup':>10}")
+    for name, legacy, bank, inputs in (
+        ("match only", legacy_match, bank_match, hrefs),
+        ("parse + match", legacy_find, crawler.find_login_link, html),
+    ):
+        old = measure(legacy, inputs)
+        new = measure(bank, inputs)
+        print(f"{name:>18} {old:>12,.0f} {new:>12,.0f} {new / old:>9.1f}x")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_bench()
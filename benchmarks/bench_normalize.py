@@ -0,0 +1,127 @@
+"""
+Benchmark for payload normalization in POST /api/console-data.
+
+Compares the old per-message loop (split the sms twice, color lookup and a
+dict per row) with main.normalize_messages (bulk, column-oriented, colors
+resolved once per app), and shows the whole ingest with the batch path for
+scale. Half of the messages carry their app name only in the sms text.
+
+Run from the app directory:
+    python benchmarks/bench_normalize.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ.setdefault("MESSAGE_MAX_ROWS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from main import ConsoleDataPayload, Message, MessageItem, Origin, SessionLocal  # noqa: E402
+
+SIZES = [10000, 100000]
+ROUNDS = 5
+APP_NAMES = ["Facebook", "Google", "WhatsApp", "Telegram", "TikTok", "Amazon", "PayPal", "Netflix"]
+
+
+def make_messages(count, run):
+    messages = []
+    for i in range(count):
+        app_name = APP_NAMES[i % len(APP_NAMES)]
+        if i % 2:
+            messages.append({
+                "app_name": app_name,
+                "carrier": f"23672{i:06d}XXX",
+                "sms": f"Your verification code is {run}-{i}",
+                "time": f"{i} minutes ago",
+            })
+        else:
+            messages.append({
+                "carrier": f"23672{i:06d}XXX",
+                "sms": f"{app_name}: Your verification code is {run}-{i}",
+                "time": f"{i} minutes ago",
+            })
+    return messages
+
+
+def legacy_normalize(messages):
+    """The previous normalization: one message at a time"""
+    unique_origins = {}
+    batch = []
+    for msg in messages:
+        app_name = msg.get("app_name", "Unknown")
+        sms_content = msg.get("sms", "")
+        if app_name == "Unknown" and sms_content and ":" in sms_content:
+            app_name = sms_content.split(":")[0].strip()
+            sms_content = ":".join(sms_content.split(":")[1:]).strip()
+        color = msg.get("color") or main.get_color_for_app(app_name)
+        unique_origins[app_name] = color
+        batch.append({
+            "app_name": app_name,
+            "carrier": msg.get("carrier", ""),
+            "sms": sms_content,
+            "time": msg.get("time", ""),
+            "color": color
+        })
+    return batch, unique_origins
+
+
+def batch_normalize(items):
+    """main.normalize_messages, on the already validated MessageItem models"""
+    columns = main.normalize_messages(items)
+    return columns, dict(zip(columns["app_name"], columns["color"]))
+
+
+def best_of(fn, messages):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(messages)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def reset_tables():
+    db = SessionLocal()
+    try:
+        db.query(Message).delete()
+        db.query(Origin).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def ingest_time(messages):
+    reset_tables()
+    payload = ConsoleDataPayload(meta={"status": "success"}, data={"messages": messages})
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        main.process_incoming_data(payload, db)
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def main_bench():
+    print("=" * 70)
+    print("PAYLOAD NORMALIZATION (ms per payload, best of 5)")
+    print("=" * 70)
+    print(f"{'messages':>10} {'legacy':>10} {'batch':>10} {'speedup':>9} {'ingest total':>14}")
+    for run, size in enumerate(SIZES):
+        messages = make_messages(size, run)
+        legacy = best_of(legacy_normalize, messages)
+        batch = best_of(batch_normalize, [MessageItem(**msg) for msg in messages])
+        total = ingest_time(messages)
+        print(
+            f"{size:>10} {legacy * 1000:>10.1f} {batch * 1000:>10.1f} "
+            f"{legacy / batch:>8.1f}x {total * 1000:>14.0f}"
+        )
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,103 @@
+"""
+Benchmark for serializing the read endpoints.
+
+Compares the old response path (return a dict, FastAPI validates it against
+the response_model and encodes it with the stdlib json module) with
+FastJSONResponse (messages serialized once per snapshot version and spliced
+into the body, origins encoded straight to bytes), with orjson and with the
+stdlib fallback. Requests go through the ASGI app, full GETs without
+If-None-Match.
+
+Run from the app directory:
+    python benchmarks/bench_read_json.py
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+os.environ.setdefault("MESSAGE_MAX_ROWS", "0")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+import main  # noqa: E402
+from main import ConsoleDataPayload, ConsoleDataResponse, Message, Origin, SessionLocal  # noqa: E402
+
+SIZES = [1000, 10000]
+REQUESTS = 50
+
+# The previous endpoints: plain dicts through response_model and JSONResponse
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/api/console-data", response_model=ConsoleDataResponse)
+async def legacy_console_data():
+    snapshot = main.console_snapshot.fresh() or await main.run_db(main.console_snapshot.refresh)
+    return {
+        "meta": {"status": "success", "timestamp": datetime.utcnow().isoformat()},
+        "data": {"messages": snapshot.messages, "cursor": snapshot.cursor, "oldest_id": snapshot.oldest_id},
+    }
+
+
+@legacy_app.get("/api/origins")
+async def legacy_origins():
+    return {"status": "success", "origins": await main.run_db(main.get_origins_from_db)}
+
+
+def seed(size):
+    db = SessionLocal()
+    try:
+        db.query(Message).delete()
+        db.query(Origin).delete()
+        db.commit()
+        main.process_incoming_data(ConsoleDataPayload(meta={}, data={"messages": [
+            {"app_name": f"App{i}", "carrier": f"23672{i:06d}XXX",
+             "sms": f"Your verification code is {i}", "time": f"{i} minutes ago"}
+            for i in range(size)
+        ]}), db)
+    finally:
+        db.close()
+
+
+async def ms_per_request(app, path):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(path)
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            response = await client.get(path)
+            assert response.status_code == 200
+        return (time.perf_counter() - start) / REQUESTS * 1000
+
+
+async def main_bench():
+    fast_encoder = main.orjson
+    print("=" * 72)
+    print(f"READ ENDPOINT SERIALIZATION (ms per request, {REQUESTS} requests)")
+    print("=" * 72)
+    print(f"{'endpoint':>18} {'rows':>7} {'legacy':>10} {'stdlib':>10} {'orjson':>10} {'speedup':>9}")
+    for size in SIZES:
+        seed(size)
+        for path in ("/api/console-data", "/api/origins"):
+            legacy = await ms_per_request(legacy_app, path)
+            main.orjson = None
+            main.console_snapshot.data = None
+            stdlib = await ms_per_request(main.app, path)
+            main.orjson = fast_encoder
+            main.console_snapshot.data = None
+            fast = await ms_per_request(main.app, path) if fast_encoder else float("nan")
+            best = fast if fast_encoder else stdlib
+            print(f"{path:>18} {size:>7} {legacy:>10.2f} {stdlib:>10.2f} {fast:>10.2f} {legacy / best:>8.1f}x")
+    if fast_encoder is None:
+        print("orjson not installed, only the stdlib fallback was measured")
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    asyncio.run(main_bench())
@@ -0,0 +1,108 @@
+"""
+Benchmark for the read helpers (snapshot messages and origins list).
+
+Compares the old queries (full Message / Origin ORM entities copied into
+dicts) with the column projections used by main.get_messages_from_db and
+main.get_origins_from_db. Reports time and tracemalloc peak per call.
+
+Run from the app directory:
+    python benchmarks/bench_read_queries.py
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert  # noqa: E402
+
+import main  # noqa: E402
+from main import Message, Origin, SessionLocal  # noqa: E402
+
+SIZES = [1000, 10000, 100000]
+ROUNDS = 3
+
+
+def legacy_messages(db):
+    """The previous snapshot query: ORM entities copied into dicts"""
+    messages = db.query(Message).order_by(Message.created_at.desc()).all()
+    return [
+        {"id": msg.id, "app_name": msg.app_name, "carrier": msg.carrier,
+         "sms": msg.sms, "time": msg.time, "color": msg.color}
+        for msg in messages
+    ]
+
+
+def legacy_origins(db):
+    origins = db.query(Origin).order_by(Origin.app_name).all()
+    return [
+        {"id": origin.id, "app_name": origin.app_name, "login_url": origin.login_url,
+         "url_checked": origin.url_checked.isoformat() if origin.url_checked else None,
+         "color": origin.color}
+        for origin in origins
+    ]
+
+
+def seed(size):
+    now = datetime.utcnow()
+    with main.engine.begin() as conn:
+        conn.execute(Message.__table__.delete())
+        conn.execute(Origin.__table__.delete())
+        conn.execute(insert(Message.__table__), [
+            {"app_name": f"App{i % 50}", "carrier": f"23672{i:06d}XXX", "sms": f"Your code is {i}",
+             "time": f"{i} minutes ago", "color": "hsl(1, 70%, 60%)", "created_at": now + timedelta(microseconds=i)}
+            for i in range(size)
+        ])
+        conn.execute(insert(Origin.__table__), [
+            {"app_name": f"App{i}", "login_url": f"https://app{i}.com/login", "url_checked": now,
+             "color": "hsl(1, 70%, 60%)", "created_at": now, "updated_at": now}
+            for i in range(size)
+        ])
+
+
+def measure(fn):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        db = SessionLocal()
+        try:
+            start = time.perf_counter()
+            fn(db)
+            best = min(best, time.perf_counter() - start)
+        finally:
+            db.close()
+    db = SessionLocal()
+    try:
+        tracemalloc.start()
+        fn(db)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        db.close()
+    return best * 1000, peak / 1024 / 1024
+
+
+def main_bench():
+    print("=" * 78)
+    print("READ QUERIES (ms per call, best of 3, and peak MiB)")
+    print("=" * 78)
+    print(f"{'query':>10} {'rows':>8} {'orm ms':>10} {'cols ms':>10} {'speedup':>8} {'orm MiB':>9} {'cols MiB':>9}")
+    for size in SIZES:
+        seed(size)
+        for name, legacy, projected in (
+            ("messages", legacy_messages, main.get_messages_from_db),
+            ("origins", legacy_origins, main.get_origins_from_db),
+        ):
+            orm_ms, orm_mib = measure(legacy)
+            cols_ms, cols_mib = measure(projected)
+            print(f"{name:>10} {size:>8} {orm_ms:>10.1f} {cols_ms:>10.1f} {orm_ms / cols_ms:>7.1f}x "
+                  f"{orm_mib:>9.1f} {cols_mib:>9.1f}")
+    print("=" * 78)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,114 @@
+"""
+Benchmark for the SQLite tuning profile (main.SQLITE_PRAGMAS).
+
+Runs writer threads (message batches, like POST /api/console-data) next to
+reader threads (snapshot query, like GET polling) against a fresh database,
+once with the driver defaults and once with the pragma profile applied.
+
+Run from the app directory:
+    python benchmarks/bench_sqlite_pragmas.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'main.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, insert, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+import main  # noqa: E402
+from main import Base, Message  # noqa: E402
+
+DURATION = 5.0
+WRITERS = 2
+READERS = 8
+BATCH_SIZE = 50
+
+
+def make_engine(name, tuned):
+    engine = create_engine(
+        f"sqlite:///{os.path.join(_tmp_dir, name)}",
+        connect_args={"check_same_thread": False},
+    )
+    if tuned:
+        event.listen(engine, "connect", main.apply_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def run_mixed(engine):
+    """Run readers and writers for DURATION seconds, return op counters"""
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+    table = Message.__table__
+
+    def writer(worker):
+        batch = 0
+        while not stop.is_set():
+            rows = [
+                {
+                    "app_name": f"App{i % 8}",
+                    "carrier": f"{worker}-{batch}-{i}",
+                    "sms": f"code {batch}-{i}",
+                    "time": "now",
+                    "color": "#ffffff",
+                    "created_at": datetime.utcnow(),
+                }
+                for i in range(BATCH_SIZE)
+            ]
+            try:
+                with engine.begin() as conn:
+                    conn.execute(insert(table), rows)
+                key = "writes"
+            except OperationalError:
+                key = "locked"
+            with lock:
+                counts[key] += 1
+            batch += 1
+
+    def reader():
+        query = select(table).order_by(table.c.created_at.desc()).limit(200)
+        while not stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(query).all()
+                key = "reads"
+            except OperationalError:
+                key = "locked"
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(WRITERS)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main_bench():
+    print("=" * 60)
+    print(f"SQLITE MIXED WORKLOAD ({WRITERS} writers, {READERS} readers, {DURATION:.0f}s)")
+    print("=" * 60)
+    print(f"{'profile':>10} {'writes/s':>12} {'reads/s':>12} {'locked':>10}")
+    for name, tuned in (("default", False), ("tuned", True)):
+        counts = run_mixed(make_engine(f"{name}.db", tuned))
+        print(
+            f"{name:>10} {counts['writes'] / DURATION:>12,.1f} "
+            f"{counts['reads'] / DURATION:>12,.1f} {counts['locked']:>10}"
+        )
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_bench()
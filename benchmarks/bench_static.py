@@ -0,0 +1,90 @@
+"""
+Benchmark for serving the dashboard (GET / and /static assets).
+
+Compares the old routes (os.path.exists and a FileResponse for index.html on
+every request, Starlette's StaticFiles mount for /static) with the in-memory
+StaticAssets store: a first visit (full GET), a reload (conditional GET with
+the ETag) and a versioned /static URL. Requests go through the ASGI app.
+
+Run from the app directory:
+    python benchmarks/bench_static.py
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'bench.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import FileResponse  # noqa: E402
+from fastapi.staticfiles import StaticFiles  # noqa: E402
+
+import main  # noqa: E402
+
+REQUESTS = 200
+
+# A copy of static/ with a stylesheet, so there is a /static asset to fetch
+static_dir = os.path.join(_tmp_dir, "static")
+shutil.copytree(main.static_dir, static_dir)
+with open(os.path.join(static_dir, "app.css"), "w") as f:
+    f.write(".card{margin:0;padding:4px}\n" * 400)
+
+# The previous routes
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/")
+async def legacy_root():
+    index_path = os.path.join(static_dir, "index.html")
+    if os.path.exists(index_path):
+        return FileResponse(index_path, media_type="text/html")
+
+
+legacy_app.mount("/static", StaticFiles(directory=static_dir), name="static_files")
+
+
+async def ms_per_request(app, path, conditional):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        first = await client.get(path, headers={"Accept-Encoding": "gzip"})
+        headers = {"Accept-Encoding": "gzip"}
+        if conditional and "etag" in first.headers:
+            headers["If-None-Match"] = first.headers["etag"]
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            response = await client.get(path, headers=headers)
+        sent = int(response.headers.get("content-length", 0))
+        return (time.perf_counter() - start) / REQUESTS * 1000, response.status_code, sent
+
+
+async def main_bench():
+    main.static_assets = main.StaticAssets(static_dir).load_all()
+    versioned = main.static_assets.url("app.css")
+
+    print("=" * 78)
+    print(f"DASHBOARD ASSETS (ms per request, {REQUESTS} requests, status and bytes sent)")
+    print("=" * 78)
+    print(f"{'request':>24} {'legacy ms':>10} {'status':>7} {'bytes':>7} {'memory ms':>10} {'status':>7} {'bytes':>7}")
+    for name, legacy_path, path, conditional in (
+        ("GET / (first visit)", "/", "/", False),
+        ("GET / (reload)", "/", "/", True),
+        ("GET /static (reload)", "/static/app.css", "/static/app.css", True),
+        ("GET /static?v= (first)", "/static/app.css", versioned, False),
+    ):
+        legacy_ms, legacy_status, legacy_size = await ms_per_request(legacy_app, legacy_path, conditional)
+        ms, status, size = await ms_per_request(main.app, path, conditional)
+        print(f"{name:>24} {legacy_ms:>10.2f} {legacy_status:>7} {legacy_size:>7,} "
+              f"{ms:>10.2f} {status:>7} {size:>7,}")
+    print("=" * 78)
+    print(f"{versioned} is sent with Cache-Control: public, max-age={main.STATIC_MAX_AGE}, immutable,")
+    print("so later visits do not request it at all")
+
+
+if __name__ == "__main__":
+    asyncio.run(main_bench())
@@ -0,0 +1,252 @@
+"""
+Login URL crawler for origins.
+
+For each app the search results page is scanned for login-looking links
+while the common login URL patterns are probed, all at the same time over
+one pooled HTTP client. A global and a per-host concurrency limit keep a
+large check-all from flooding the network or a single host.
+
+Results pages can be parsed in a process pool: the fetch stage hands raw
+bytes to the parse stage through a bounded queue, so parsing a large
+check-all uses several cores and never blocks the event loop.
+"""
+import asyncio
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import quote_plus, urlsplit
+
+import httpx
+
+SEARCH_URL = "https://www.google.com/search?q={query}"
+CANDIDATE_URLS = [
+    "https://www.{app}.com/login",
+    "https://{app}.com/login",
+    "https://accounts.{app}.com",
+    "https://login.{app}.com",
+]
+# Results pages are fed to the link scanner in chunks of this many characters,
+# scanning stops after the chunk with the first match
+SCAN_CHUNK_SIZE = 16 * 1024
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+
+class CrawlError(Exception):
+    """Every request for an app failed, the result is unknown (not "not found")"""
+
+
+@lru_cache(maxsize=1024)
+def login_link_pattern(app_name: str) -> re.Pattern:
+    """Login-related URL patterns for an app, compiled once into one alternation"""
+    app = re.escape(app_name.lower())
+    return re.compile('|'.join([
+        r'https?://[^/]*' + app + r'[^/]*/login',
+        r'https?://[^/]*' + app + r'[^/]*/signin',
+        r'https?://[^/]*' + app + r'[^/]*/auth',
+        r'https?://accounts\.' + app,
+        r'https?://login\.' + app,
+    ]), re.IGNORECASE)
+
+
+class LinkScanner(HTMLParser):
+    """Streaming <a href> scanner keeping the first href that matches a pattern.
+
+    Only start tags are looked at, no document tree is built.
+    """
+
+    def __init__(self, pattern: re.Pattern):
+        super().__init__(convert_charrefs=True)
+        self.pattern = pattern
+        self.match = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a' or self.match is not None:
+            return
+        # The last href wins, like BeautifulSoup with duplicate attributes
+        href = None
+        for name, value in attrs:
+            if name == 'href':
+                href = value
+        if href and self.pattern.search(href):
+            self.match = href
+
+
+def find_login_link(html: str, app_name: str) -> Optional[str]:
+    """Return the first login-looking link for app_name in a results page"""
+    scanner = LinkScanner(login_link_pattern(app_name))
+    for start in range(0, len(html), SCAN_CHUNK_SIZE):
+        scanner.feed(html[start:start + SCAN_CHUNK_SIZE])
+        if scanner.match is not None:
+            break
+
+    href = scanner.match
+    # Clean up Google redirect URLs
+    if href and 'google.com/url?q=' in href:
+        href = href.split('google.com/url?q=')[1].split('&')[0]
+    return href
+
+
+def extract_login_link(content: bytes, encoding: Optional[str], app_name: str) -> Optional[str]:
+    """find_login_link on a raw response body, runs in the parse processes"""
+    return find_login_link(content.decode(encoding or 'utf-8', errors='replace'), app_name)
+
+
+class LoginUrlCrawler:
+    """Concurrent login URL finder sharing one pooled HTTP client.
+
+    Use as an async context manager, or call open() and close(). The search
+    URL and candidate URL templates can point at a local stub server for
+    testing. With parse_workers results pages are parsed in that many
+    processes, at most parse_queue_size pages wait for a free one.
+    """
+
+    def __init__(self, max_concurrency: int = 20, per_host_concurrency: int = 2,
+                 search_timeout: float = 10.0, probe_timeout: float = 5.0,
+                 search_url: str = SEARCH_URL, candidate_urls: List[str] = CANDIDATE_URLS,
+                 parse_workers: int = 0, parse_queue_size: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.search_timeout = search_timeout
+        self.probe_timeout = probe_timeout
+        self.search_url = search_url
+        self.candidate_urls = candidate_urls
+        self.parse_workers = parse_workers
+        self.parse_queue_size = parse_queue_size or 2 * parse_workers
+        self._client = None
+        self._global_limit = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._parse_pool = None
+        self._parse_queue = None
+        self._parsers = []
+
+    async def open(self):
+        self._client = httpx.AsyncClient(
+            headers=HEADERS,
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency
+            )
+        )
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        if self.parse_workers > 0:
+            # spawn: the workers start a fresh interpreter instead of forking the
+            # app's state. They import this module, and also re-run the main
+            # script as __mp_main__ when there is one (`python main.py`)
+            self._parse_pool = ProcessPoolExecutor(
+                self.parse_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            self._parse_queue = asyncio.Queue(self.parse_queue_size)
+            self._parsers = [asyncio.ensure_future(self._parse_stage()) for _ in range(self.parse_workers)]
+        return self
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        for parser in self._parsers:
+            parser.cancel()
+        await asyncio.gather(*self._parsers, return_exceptions=True)
+        self._parsers = []
+        if self._parse_pool is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._parse_pool.shutdown)
+            self._parse_pool = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    async def _request(self, method: str, url: str, timeout: float) -> httpx.Response:
+        # Per host first: requests queued for a busy host do not hold a global slot
+        async with self._host_limit(url), self._global_limit:
+            return await self._client.request(method, url, timeout=timeout, follow_redirects=True)
+
+    async def _search(self, app_name: str) -> Optional[str]:
+        """Look for a login link on the search results page"""
+        url = self.search_url.format(query=quote_plus(f"{app_name} login"))
+        response = await self._request("GET", url, self.search_timeout)
+        if response.status_code != 200:
+            return None
+        return await self._parse(response.content, response.encoding, app_name)
+
+    async def _parse(self, content: bytes, encoding: Optional[str], app_name: str) -> Optional[str]:
+        if self._parse_pool is None:
+            return extract_login_link(content, encoding, app_name)
+        # Waits here while the parse processes are behind
+        result = asyncio.get_running_loop().create_future()
+        await self._parse_queue.put((content, encoding, app_name, result))
+        return await result
+
+    async def _parse_stage(self):
+        """Feed queued pages to the process pool, one page at a time per worker"""
+        loop = asyncio.get_running_loop()
+        while True:
+            content, encoding, app_name, result = await self._parse_queue.get()
+            if result.done():
+                # The crawl was cancelled while the page waited
+                continue
+            try:
+                link = await loop.run_in_executor(self._parse_pool, extract_login_link, content, encoding, app_name)
+            except asyncio.CancelledError:
+                result.cancel()
+                raise
+            except Exception as e:
+                if not result.done():
+                    result.set_exception(e)
+            else:
+                if not result.done():
+                    result.set_result(link)
+
+    async def _probe(self, url: str) -> bool:
+        """Check whether a candidate login URL exists"""
+        try:
+            response = await self._request("HEAD", url, self.probe_timeout)
+        except httpx.InvalidURL:
+            # The app name does not make a valid URL, e.g. "Foo:Bar"
+            return False
+        return response.status_code < 400
+
+    async def find_login_url(self, app_name: str) -> Optional[str]:
+        """Find the login URL of an app, None if there is none.
+
+        Raises CrawlError when no request got a response at all.
+        """
+        candidates = [template.format(app=app_name.lower()) for template in self.candidate_urls]
+        search = asyncio.ensure_future(self._search(app_name))
+        probes = [asyncio.ensure_future(self._probe(url)) for url in candidates]
+
+        try:
+            errors = []
+            try:
+                found = await search
+                if found:
+                    return found
+            except httpx.HTTPError as e:
+                errors.append(e)
+
+            # Fallback: first candidate (in order) that exists
+            for url, probe in zip(candidates, probes):
+                try:
+                    if await probe:
+                        return url
+                except httpx.HTTPError as e:
+                    errors.append(e)
+
+            if len(errors) == len(probes) + 1:
+                raise CrawlError(f"All requests for {app_name} failed: {errors[0]!r}")
+            return None
+        finally:
+            for probe in probes:
+                probe.cancel()
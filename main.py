@@ -1,28 +1,182 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import create_engine, BigInteger, Column, Integer, String, DateTime, Text, Index, and_, bindparam, event, func, insert, literal, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+# Pydantic v1 (Python 3.7 requirements) also exports ConfigDict, so check the
+# v2 API instead. v1 coerces numbers to str anyway
+PYDANTIC_V2 = hasattr(BaseModel, "model_validate")
+if PYDANTIC_V2:
+    from pydantic import ConfigDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from typing import List, Dict, Any, NamedTuple, Optional
+import asyncio
+import hashlib
 import json
+import mimetypes
 import os
-import requests
-from bs4 import BeautifulSoup
 import re
+import secrets
+import threading
 import time
+import zlib
+
+try:
+    # Optional fast JSON encoder for the read endpoints, stdlib json otherwise
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional brotli content coding for compressed responses, gzip otherwise
+    import brotli
+except ImportError:
+    brotli = None
+
+from crawler import LoginUrlCrawler
 
 # Database setup
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
+SQLALCHEMY_DATABASE_URL = os.environ.get("DATABASE_URL", "sqlite:///./app.db")
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+
+# SQLite tuning profile, applied to every new connection.
+# WAL lets GET polling read while a POST is writing, busy_timeout makes
+# writers wait for the lock instead of failing with "database is locked".
+# Set SQLITE_TUNING=0 to keep the driver defaults, or an individual value to
+# an empty string to skip that pragma (e.g. SQLITE_JOURNAL_MODE=DELETE on
+# network filesystems, where WAL is not supported).
+SQLITE_TUNING = os.environ.get("SQLITE_TUNING", "1") != "0"
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": os.environ.get("SQLITE_CACHE_SIZE", "-20000"),  # negative = KiB
+    "mmap_size": os.environ.get("SQLITE_MMAP_SIZE", "134217728"),
+    "temp_store": os.environ.get("SQLITE_TEMP_STORE", "MEMORY"),
+    "busy_timeout": os.environ.get("SQLITE_BUSY_TIMEOUT", "5000"),  # milliseconds
+}
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Connect-event hook applying SQLITE_PRAGMAS"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            if value:
+                cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+if SQLITE_TUNING and engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Endpoints run their database work (sync SQLAlchemy helpers) in the
+# threadpool, so a slow query or commit does not block the event loop.
+# DB_ASYNC=1 runs them on an aiosqlite engine through AsyncSession.run_sync
+# instead. That keeps the I/O off the loop, but normalization, snapshot
+# serialization and JSON encoding then run on the event loop thread, which
+# gives worse tail latency under load (benchmarks/bench_concurrency.py).
+async_engine = None
+AsyncSessionLocal = None
+if os.environ.get("DB_ASYNC", "0") == "1" and engine.dialect.name == "sqlite":
+    try:
+        import aiosqlite
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    except ImportError:
+        pass
+    else:
+        async_engine = create_async_engine(engine.url.set(drivername="sqlite+aiosqlite"))
+        if SQLITE_TUNING:
+            event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+        AsyncSessionLocal = sessionmaker(async_engine, class_=AsyncSession, autoflush=False)
 Base = declarative_base()
 
+# Message retention: old rows are expired by age and by row count
+# (set either value to 0 to disable that limit)
+MESSAGE_RETENTION_HOURS = float(os.environ.get("MESSAGE_RETENTION_HOURS", "24"))
+MESSAGE_MAX_ROWS = int(os.environ.get("MESSAGE_MAX_ROWS", "5000"))
+# Keys of posted messages are kept this long after they were last posted, so
+# a message still in the posted snapshot is not stored again after its row
+# expired (0 keeps them forever)
+MESSAGE_KEY_RETENTION_HOURS = float(os.environ.get("MESSAGE_KEY_RETENTION_HOURS", "48"))
+
+# Default and maximum page size for paginated GET /api/console-data reads
+MESSAGE_PAGE_SIZE = int(os.environ.get("MESSAGE_PAGE_SIZE", "100"))
+MESSAGE_PAGE_MAX = int(os.environ.get("MESSAGE_PAGE_MAX", "1000"))
+
+# Max age in seconds of the in-memory GET /api/console-data snapshot
+CONSOLE_SNAPSHOT_TTL = float(os.environ.get("CONSOLE_SNAPSHOT_TTL", "30"))
+
+# Response compression negotiated from Accept-Encoding (brotli or gzip).
+# Bodies smaller than COMPRESSION_MIN_SIZE bytes are sent as they are; set
+# RESPONSE_COMPRESSION=0 when a proxy in front of the app already compresses
+RESPONSE_COMPRESSION = os.environ.get("RESPONSE_COMPRESSION", "1") != "0"
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+
+# Dashboard assets under static/ are loaded into memory (and compressed) at
+# startup. STATIC_DEV_MODE=1 checks their mtime on every request to reload
+# edited files, and turns off long-lived caching of versioned /static URLs
+STATIC_DEV_MODE = os.environ.get("STATIC_DEV_MODE", "0") == "1"
+# Max age in seconds of /static URLs that carry the current ?v=<content hash>
+STATIC_MAX_AGE = int(os.environ.get("STATIC_MAX_AGE", "31536000"))
+
+# Most app colors kept in memory
+COLOR_CACHE_SIZE = int(os.environ.get("COLOR_CACHE_SIZE", "10000"))
+
+# Server-Sent Events stream: per-client queue length, idle heartbeat interval
+# and the reconnect delay suggested to browsers. Messages posted to another
+# worker process only reach a stream through the database, which every
+# stream checks after STREAM_POLL_SECONDS without an in-process event
+STREAM_QUEUE_SIZE = int(os.environ.get("STREAM_QUEUE_SIZE", "100"))
+STREAM_HEARTBEAT_SECONDS = float(os.environ.get("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_POLL_SECONDS = float(os.environ.get("STREAM_POLL_SECONDS", "5"))
+STREAM_RETRY_MS = 3000
+
+# Login URL crawler: requests in flight overall and per host
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", "20"))
+CRAWL_PER_HOST_CONCURRENCY = int(os.environ.get("CRAWL_PER_HOST_CONCURRENCY", "2"))
+# Processes parsing search results pages, 0 (default) parses in the event
+# loop. Worth it only for large check-alls on a multi-core host
+CRAWL_PARSE_WORKERS = int(os.environ.get("CRAWL_PARSE_WORKERS", "0"))
+
+# Crawl job queue: origins crawled at the same time, attempts before a job
+# fails, first retry delay (doubled per attempt) and how long finished jobs
+# are kept for progress reporting
+CRAWL_WORKERS = int(os.environ.get("CRAWL_WORKERS", "8"))
+CRAWL_MAX_ATTEMPTS = int(os.environ.get("CRAWL_MAX_ATTEMPTS", "3"))
+CRAWL_RETRY_SECONDS = float(os.environ.get("CRAWL_RETRY_SECONDS", "30"))
+CRAWL_JOB_RETENTION_HOURS = float(os.environ.get("CRAWL_JOB_RETENTION_HOURS", "24"))
+CRAWL_IDLE_POLL_SECONDS = 5
+# Crawl results are written in batches: at most this many per transaction,
+# collected for this long after the first one finished
+CRAWL_RESULT_BATCH = 100
+CRAWL_RESULT_FLUSH_SECONDS = 1.0
+
+# Check-all skips origins crawled more recently than this: found login URLs
+# stay valid longer than "not found" results
+CRAWL_FOUND_TTL_HOURS = float(os.environ.get("CRAWL_FOUND_TTL_HOURS", "168"))
+CRAWL_NOT_FOUND_TTL_HOURS = float(os.environ.get("CRAWL_NOT_FOUND_TTL_HOURS", "24"))
+
 # Models
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pages per carrier are index range scans (SQLite indexes end
+        # in the rowid, so app_name's own index serves pages per app)
+        Index("ix_messages_carrier", "carrier"),
+        # Snapshot ORDER BY and retention expiry
+        Index("ix_messages_created_at", "created_at"),
+        # Never reuse ids of expired rows, they are the delta cursor
+        {"sqlite_autoincrement": True},
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     app_name = Column(String, index=True)
@@ -32,6 +186,16 @@ class Message(Base):
     color = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class MessageKey(Base):
+    """Identity of every recently posted message, stored or expired"""
+    __tablename__ = "message_keys"
+    
+    # 64-bit hash of the message (message_key), the rowid on SQLite
+    key = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=False)
+    # Random id of the ingest transaction that first posted the message
+    batch = Column(BigInteger)
+    seen_at = Column(DateTime, index=True)
+
 class Origin(Base):
     __tablename__ = "origins"
     
@@ -43,25 +207,165 @@ class Origin(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
-# Create tables
-try:
-    Base.metadata.create_all(bind=engine)
-    print("Database tables created successfully")
-except Exception as e:
-    print(f"Error creating database tables: {e}")
+class CrawlJob(Base):
+    __tablename__ = "crawl_jobs"
+    __table_args__ = (
+        # Workers claim the next due queued job
+        Index("ix_crawl_jobs_status_next_attempt", "status", "next_attempt_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    origin_id = Column(Integer, index=True)
+    app_name = Column(String)
+    status = Column(String, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+    
+    version = Column(Integer, primary_key=True)
+    description = Column(String)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+def _dialect_insert(db):
+    """insert() construct with ON CONFLICT support for a session's or connection's database"""
+    bind = db.get_bind() if isinstance(db, Session) else db
+    if bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+def message_key(app_name, carrier, sms, time) -> int:
+    """Identity of a message across repeated snapshots of the same console.
+    
+    A signed 64-bit hash of the fields, missing values count as empty.
+    """
+    data = "\x1f".join((app_name or "", carrier or "", sms or "", time or ""))
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+# Schema migrations
+# Applied in order at startup and recorded in schema_migrations, so existing
+# app.db files are upgraded in place. Every step must be idempotent: a fresh
+# database gets the current schema from step 1 and later steps are no-ops.
+def _create_tables(conn):
+    Base.metadata.create_all(bind=conn)
+
+def _create_message_indexes(conn):
+    for index in Message.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+
+def _create_crawl_jobs(conn):
+    CrawlJob.__table__.create(bind=conn, checkfirst=True)
+
+def _create_message_keys(conn):
+    MessageKey.__table__.create(bind=conn, checkfirst=True)
+    # Stored messages count as seen now, so they are not posted again
+    now = datetime.utcnow()
+    keys = {message_key(*row) for row in conn.execute(select(Message.app_name, Message.carrier, Message.sms, Message.time))}
+    if keys:
+        conn.execute(
+            _dialect_insert(conn)(MessageKey.__table__).on_conflict_do_nothing(),
+            [{"key": key, "batch": 0, "seen_at": now} for key in keys]
+        )
+    conn.execute(text("DROP INDEX IF EXISTS ix_messages_dedup"))
+
+def _slim_message_indexes(conn):
+    conn.execute(text("DROP INDEX IF EXISTS ix_messages_app_name_id"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_messages_carrier_id"))
+    _create_message_indexes(conn)
+
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "message read, dedup and retention indexes", _create_message_indexes),
+    (3, "crawl job queue", _create_crawl_jobs),
+    (4, "message dedup keys", _create_message_keys),
+    (5, "drop redundant message page indexes", _slim_message_indexes),
+]
+
+def run_migrations(bind=engine):
+    """Apply the migrations that are not recorded yet"""
+    SchemaMigration.__table__.create(bind=bind, checkfirst=True)
+    with bind.connect() as conn:
+        applied = {row[0] for row in conn.execute(select(SchemaMigration.version))}
+    
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with bind.begin() as conn:
+                migrate(conn)
+                conn.execute(insert(SchemaMigration.__table__).values(version=version, description=description))
+            print(f"Applied migration {version}: {description}")
+        except IntegrityError:
+            # Another worker process applied it at the same time
+            pass
+
+# Crawler parse processes (spawn) import the main script again as
+# __mp_main__ when the app runs as `python main.py`. They only parse pages,
+# so the startup work below is skipped there
+PARSE_WORKER_PROCESS = __name__ == "__mp_main__"
+
+# Create tables and upgrade existing databases
+if not PARSE_WORKER_PROCESS:
+    try:
+        run_migrations()
+        print("Database tables created successfully")
+    except Exception as e:
+        print(f"Error creating database tables: {e}")
 
 # Pydantic models
 class MessageItem(BaseModel):
-    app_name: str
-    carrier: str
-    sms: str
-    time: str
-    color: str = None
+    # Defaults and explicit nulls are stored as sent, like the old dict access,
+    # except a null app_name, which normalize_messages treats as "Unknown"
+    app_name: Optional[str] = "Unknown"
+    carrier: Optional[str] = ""
+    sms: Optional[str] = ""
+    time: Optional[str] = ""
+    color: Optional[str] = None
+    
+    if PYDANTIC_V2:
+        model_config = ConfigDict(coerce_numbers_to_str=True)
+
+class ConsoleData(BaseModel):
+    messages: List[MessageItem] = []
 
 class ConsoleDataPayload(BaseModel):
     meta: Dict[str, Any]
-    data: Dict[str, Any]
-    message: str = None
+    data: ConsoleData
+    message: Optional[str] = None
+
+def parse_console_payload(body: bytes) -> ConsoleDataPayload:
+    """Validate a raw request body straight into ConsoleDataPayload.
+    
+    Pydantic v2 parses the JSON directly into the typed models, without an
+    intermediate tree of dicts to decode and then copy.
+    """
+    if PYDANTIC_V2:
+        return ConsoleDataPayload.model_validate_json(body)
+    return ConsoleDataPayload.parse_raw(body)
+
+def inline_json_schema(model) -> dict:
+    """JSON schema of a model with the nested model definitions inlined.
+    
+    For request bodies documented through openapi_extra, where references
+    to the schema's own $defs would not resolve.
+    """
+    schema = model.model_json_schema() if PYDANTIC_V2 else model.schema()
+    definitions = {**schema.pop("$defs", {}), **schema.pop("definitions", {})}
+    
+    def resolve(node):
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(definitions[node["$ref"].rsplit("/", 1)[-1]])
+            return {key: resolve(value) for key, value in node.items()}
+        if isinstance(node, list):
+            return [resolve(item) for item in node]
+        return node
+    
+    return resolve(schema)
 
 class ConsoleDataResponse(BaseModel):
     meta: dict
@@ -80,269 +384,1142 @@ app.add_middleware(
     expose_headers=["*"],  # Expose all headers
 )
 
-# Dependency
-def get_db():
+def _call_with_session(fn):
     db = SessionLocal()
     try:
-        yield db
+        return fn(db)
     finally:
         db.close()
 
+async def run_db(fn):
+    """Run fn(db) with its own session without blocking the event loop.
+    
+    fn is ordinary sync SQLAlchemy code: on the async engine it runs through
+    AsyncSession.run_sync, otherwise in the threadpool with a sync session.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            return await session.run_sync(fn)
+    return await run_in_threadpool(_call_with_session, fn)
+
 # Color mapping for app names
+# Colors per app name, least recently used first
 color_mapping = {}
+color_mapping_lock = threading.Lock()
 
 def get_color_for_app(app_name):
     """Get a consistent color for an app name"""
-    if app_name not in color_mapping:
-        # Generate a consistent color based on the app name
-        hash_value = hash(app_name) % 360
-        color_mapping[app_name] = f"hsl({hash_value}, 70%, 60%)"
-    return color_mapping[app_name]
+    with color_mapping_lock:
+        color = color_mapping.pop(app_name, None)
+        if color is None:
+            # crc32 is the same in every process and after restarts, unlike hash()
+            hash_value = zlib.crc32(app_name.encode("utf-8")) % 360
+            color = f"hsl({hash_value}, 70%, 60%)"
+            if len(color_mapping) >= COLOR_CACHE_SIZE:
+                del color_mapping[next(iter(color_mapping))]
+        color_mapping[app_name] = color
+    return color
 
-def process_incoming_data(payload: ConsoleDataPayload, db: Session):
-    """Process incoming data and store in database"""
-    if not payload.data or "messages" not in payload.data:
-        return
+def warm_color_cache(db: Session):
+    """Preload the stored colors of known apps, most recently updated last"""
+    rows = db.execute(
+        select(Origin.app_name, Origin.color)
+        .where(Origin.color.isnot(None))
+        .order_by(Origin.updated_at.desc())
+        .limit(COLOR_CACHE_SIZE)
+    ).all()
+    with color_mapping_lock:
+        for app_name, color in reversed(rows):
+            color_mapping[app_name] = color
+
+if not PARSE_WORKER_PROCESS:
+    try:
+        _call_with_session(warm_color_cache)
+    except Exception as e:
+        print(f"Error loading app colors: {e}")
+
+# Keys per SELECT ... IN, below SQLite's old 999 variable limit
+MESSAGE_KEY_CHUNK = 500
+
+def claim_message_keys(db: Session, keys: List[int]) -> set:
+    """Record posted message keys, return the ones never posted before.
     
-    messages = payload.data["messages"]
-    if not messages:
+    The keys are upserted with ON CONFLICT, so concurrent ingests of the same
+    messages cannot both claim one: only the transaction whose insert won
+    leaves its batch id on the key. Keys already known get their seen_at
+    refreshed once it is a quarter of MESSAGE_KEY_RETENTION_HOURS old, so
+    reposting an unchanged snapshot writes no rows.
+    """
+    if not keys:
+        return set()
+    batch = secrets.randbits(62)
+    now = datetime.utcnow()
+    table = MessageKey.__table__
+    stmt = _dialect_insert(db)(table)
+    if MESSAGE_KEY_RETENTION_HOURS > 0:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={"seen_at": stmt.excluded.seen_at},
+            where=table.c.seen_at < now - timedelta(hours=MESSAGE_KEY_RETENTION_HOURS / 4)
+        )
+    else:
+        # Keys are kept forever, seen_at is never read
+        stmt = stmt.on_conflict_do_nothing(index_elements=[table.c.key])
+    db.execute(stmt, [{"key": key, "batch": batch, "seen_at": now} for key in keys])
+    
+    claimed = set()
+    for start in range(0, len(keys), MESSAGE_KEY_CHUNK):
+        claimed.update(db.execute(
+            select(table.c.key).where(table.c.key.in_(keys[start:start + MESSAGE_KEY_CHUNK]), table.c.batch == batch)
+        ).scalars())
+    return claimed
+
+def expire_message_keys(db: Session) -> int:
+    """Drop keys of messages not posted within MESSAGE_KEY_RETENTION_HOURS"""
+    if MESSAGE_KEY_RETENTION_HOURS <= 0:
+        return 0
+    cutoff = datetime.utcnow() - timedelta(hours=MESSAGE_KEY_RETENTION_HOURS)
+    return db.query(MessageKey).filter(MessageKey.seen_at < cutoff).delete(synchronize_session=False)
+
+def expire_old_messages(db: Session):
+    """Drop messages outside the retention window or beyond the row cap.
+    Returns the number of deleted rows."""
+    deleted = 0
+    if MESSAGE_RETENTION_HOURS > 0:
+        cutoff = datetime.utcnow() - timedelta(hours=MESSAGE_RETENTION_HOURS)
+        deleted += db.query(Message).filter(Message.created_at < cutoff).delete(synchronize_session=False)
+    
+    if MESSAGE_MAX_ROWS > 0:
+        # Newest rows have the highest ids, keep the latest MESSAGE_MAX_ROWS of them
+        boundary_id = db.query(Message.id).order_by(Message.id.desc()).offset(MESSAGE_MAX_ROWS).limit(1).scalar()
+        if boundary_id is not None:
+            deleted += db.query(Message).filter(Message.id <= boundary_id).delete(synchronize_session=False)
+    return deleted
+
+def upsert_origins(db: Session, origins: Dict[str, str]):
+    """Insert or update origins (app_name -> color) in one executemany.
+    
+    Existing origins are only written when their color actually changed,
+    so a batch of already known apps produces no writes. Bind variables are
+    per row, so any number of apps stays below SQLite's variable limit.
+    """
+    if not origins:
         return
     
-    # Clear old messages (keep only latest batch)
-    db.query(Message).delete()
+    now = datetime.utcnow()
+    table = Origin.__table__
+    stmt = _dialect_insert(db)(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.app_name],
+        set_={"color": stmt.excluded.color, "updated_at": stmt.excluded.updated_at},
+        where=table.c.color.is_distinct_from(stmt.excluded.color)
+    )
+    db.execute(stmt, [
+        {"app_name": app_name, "color": color, "created_at": now, "updated_at": now}
+        for app_name, color in origins.items()
+    ])
+
+# Message fields produced by normalize_messages, in message_key order
+MESSAGE_COLUMNS = ("app_name", "carrier", "sms", "time", "color")
+
+def normalize_messages(messages: List[MessageItem]) -> Dict[str, list]:
+    """Normalize a payload's messages in bulk into columns, one list per field.
+    
+    App names missing from a message (or null) are taken from an
+    "App: text" sms, and colors are resolved once per app.
+    """
+    app_names = ["Unknown" if msg.app_name is None else msg.app_name for msg in messages]
+    sms = [msg.sms for msg in messages]
+    
+    # If app_name not in message, try to extract from SMS
+    for i in [i for i, app_name in enumerate(app_names) if app_name == "Unknown"]:
+        text = sms[i]
+        if text and ":" in text:
+            head, _, tail = text.partition(":")
+            app_names[i] = head.strip()
+            sms[i] = tail.strip()
     
-    # Track unique origins
-    unique_origins = set()
+    # Assign color if not provided
+    colors = [msg.color for msg in messages]
+    palette = {
+        app_name: get_color_for_app(app_name)
+        for app_name in {app_name for app_name, color in zip(app_names, colors) if not color}
+    }
+    colors = [color or palette[app_name] for app_name, color in zip(app_names, colors)]
+    
+    return {
+        "app_name": app_names,
+        "carrier": [msg.carrier for msg in messages],
+        "sms": sms,
+        "time": [msg.time for msg in messages],
+        "color": colors
+    }
+
+def process_incoming_data(payload: ConsoleDataPayload, db: Session):
+    """Process incoming data and store new messages in database.
+    
+    The extension re-posts an almost identical console snapshot every few
+    seconds, so messages that were posted before are skipped and only the
+    new ones are inserted, even when the earlier row already expired.
+    Returns the number of inserted messages.
+    """
+    messages = payload.data.messages
+    if not messages:
+        return 0
     
-    # Process messages in original order with incremental timestamps
+    # Normalize messages in original order
     # Assuming external API sends oldest first, newest last
-    # Each subsequent message gets a later timestamp
+    columns = normalize_messages(messages)
     
-    # Process and store each message with incremental timestamps
-    # We want newest messages to have the LATEST timestamps
+    # Track unique origins (latest color wins)
+    unique_origins = dict(zip(columns["app_name"], columns["color"]))
+    
+    # Skip messages posted before (and duplicates within the batch)
+    first_rows = {}
+    for row in zip(*(columns[name] for name in MESSAGE_COLUMNS)):
+        first_rows.setdefault(message_key(*row[:4]), row)
+    new_keys = claim_message_keys(db, list(first_rows))
+    new_rows = [row for key, row in first_rows.items() if key in new_keys]
+    
+    # Store new messages with incremental timestamps
+    # We want newest messages to have the LATEST timestamps, and a later
+    # batch must always sort after an earlier one
     base_time = datetime.utcnow()
-    for i, msg in enumerate(messages):  # Use original order, not reversed
-        # Extract app name if not provided
-        app_name = msg.get("app_name", "Unknown")
-        sms_content = msg.get("sms", "")
-        
-        # If app_name not in message, try to extract from SMS
-        if app_name == "Unknown" and sms_content and ":" in sms_content:
-            app_name = sms_content.split(":")[0].strip()
-            sms_content = ":".join(sms_content.split(":")[1:]).strip()
-        
-        # Assign color if not provided
-        color = msg.get("color") or get_color_for_app(app_name)
-        
-        # Add to unique origins
-        unique_origins.add((app_name, color))
-        
-        # Create message record with incremental timestamp
-        # Each message gets a slightly later timestamp to ensure proper ordering
-        message_time = base_time + timedelta(seconds=i)
-        db_message = Message(
-            app_name=app_name,
-            carrier=msg.get("carrier", ""),
-            sms=sms_content,
-            time=msg.get("time", ""),
-            color=color,
-            created_at=message_time
-        )
-        db.add(db_message)
+    new_rows = [
+        dict(zip(MESSAGE_COLUMNS, row), created_at=base_time + timedelta(microseconds=i))
+        for i, row in enumerate(new_rows)
+    ]
+    
+    # Single executemany instead of one ORM object per message
+    previous_id = db.query(func.max(Message.id)).scalar() or 0
+    if new_rows:
+        db.execute(insert(Message.__table__), new_rows)
+    
+    # Expire old rows instead of wiping the table
+    expired = expire_old_messages(db)
+    expire_message_keys(db)
     
     # Update origins table
-    for app_name, color in unique_origins:
-        existing_origin = db.query(Origin).filter(Origin.app_name == app_name).first()
-        if not existing_origin:
-            # Create new origin
-            new_origin = Origin(
-                app_name=app_name,
-                color=color
-            )
-            db.add(new_origin)
-        else:
-            # Update color if changed
-            existing_origin.color = color
-            existing_origin.updated_at = datetime.utcnow()
+    upsert_origins(db, unique_origins)
     
     db.commit()
+    
+    # Write-through: rebuild the GET snapshot only when the messages changed
+    # and push the new messages to stream subscribers
+    if new_rows or expired:
+        snapshot = console_snapshot.refresh(db)
+        if message_broker.has_subscribers():
+            message_broker.publish({
+                "messages": [msg for msg in snapshot.messages if msg["id"] > previous_id],
+                "cursor": snapshot.cursor,
+                "oldest_id": snapshot.oldest_id
+            }, previous_id)
+    return len(new_rows)
 
 # Helper function to get messages from database
+# Reads select only these columns: plain rows, no ORM objects to build
+MESSAGE_FIELDS = (Message.id, Message.app_name, Message.carrier, Message.sms, Message.time, Message.color)
+MESSAGE_KEYS = tuple(column.key for column in MESSAGE_FIELDS)
+
+def _message_dicts(db: Session, statement):
+    return [dict(zip(MESSAGE_KEYS, row)) for row in db.execute(statement)]
+
 def get_messages_from_db(db: Session):
     """Retrieve all messages from database"""
-    messages = db.query(Message).order_by(Message.created_at.desc()).all()
+    return _message_dicts(db, select(*MESSAGE_FIELDS).order_by(Message.created_at.desc()))
+
+def _filter_messages(query, app_name: Optional[str] = None, carrier: Optional[str] = None):
+    if app_name is not None:
+        query = query.filter(Message.app_name == app_name)
+    if carrier is not None:
+        query = query.filter(Message.carrier == carrier)
+    return query
+
+def get_messages_since(db: Session, since: int, app_name: Optional[str] = None,
+                       carrier: Optional[str] = None):
+    """Retrieve messages stored after the `since` cursor (a Message.id).
+    
+    Returns (messages, cursor, oldest_id): the new messages newest first,
+    the cursor to send on the next call and the oldest id still stored.
+    """
+    oldest_id, latest_id = db.execute(select(func.min(Message.id), func.max(Message.id))).one()
+    query = _filter_messages(select(*MESSAGE_FIELDS), app_name, carrier).filter(Message.id > since)
+    messages = _message_dicts(db, query.order_by(Message.id.desc()))
+    return messages, latest_id or 0, oldest_id
+
+def get_messages_page(db: Session, limit: int, before_id: Optional[int] = None,
+                      app_name: Optional[str] = None, carrier: Optional[str] = None):
+    """Retrieve one page of messages, newest first, using keyset pagination.
+    
+    Returns (messages, next_before_id); pass next_before_id as `before_id`
+    to get the following page, it is None on the last page.
+    """
+    query = _filter_messages(select(*MESSAGE_FIELDS), app_name, carrier)
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    # One extra row tells whether another page exists
+    messages = _message_dicts(db, query.order_by(Message.id.desc()).limit(limit + 1))
+    next_before_id = messages[limit - 1]["id"] if len(messages) > limit else None
+    return messages[:limit], next_before_id
+
+def get_origins_from_db(db: Session):
+    """Retrieve all origins from database"""
+    rows = db.execute(
+        select(Origin.id, Origin.app_name, Origin.login_url, Origin.url_checked, Origin.color)
+        .order_by(Origin.app_name)
+    )
     return [
         {
-            "app_name": msg.app_name,
-            "carrier": msg.carrier,
-            "sms": msg.sms,
-            "time": msg.time,
-            "color": msg.color
+            "id": origin_id,
+            "app_name": app_name,
+            "login_url": login_url,
+            "url_checked": url_checked.isoformat() if url_checked else None,
+            "color": color
         }
-        for msg in messages
+        for origin_id, app_name, login_url, url_checked, color in rows
     ]
 
-def find_login_url(app_name: str) -> Optional[str]:
-    """Crawl and find login URL for an app"""
-    try:
-        # Common search patterns
-        search_queries = [
-            f"{app_name} login",
-            f"{app_name} sign in",
-            f"{app_name} official website login"
-        ]
-        
-        # Try to find official website
-        search_url = f"https://www.google.com/search?q={search_queries[0]}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(search_url, headers=headers, timeout=10)
-        if response.status_code != 200:
+def dumps_json(data) -> bytes:
+    """Compact UTF-8 JSON, encoded with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class FastJSONResponse(Response):
+    """JSON response encoded with dumps_json, passes pre-encoded bytes through.
+    
+    Endpoints return it directly, so FastAPI skips the response_model
+    validation and its own encoding pass.
+    """
+    media_type = "application/json"
+    
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps_json(content)
+
+def make_etag(encoded: bytes) -> str:
+    """Strong ETag from a hash of serialized data"""
+    return '"' + hashlib.blake2b(encoded, digest_size=16).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/"x" matches "x"
+    candidates = [tag.strip() for tag in header.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+def not_modified(etag: str) -> Response:
+    """Bodyless 304 response for a matching conditional GET"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+# Content codings we can produce, in order of preference
+CONTENT_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred content coding for an Accept-Encoding header, None for identity"""
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params[:2].lower() == "q=":
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    
+    best, best_weight = None, 0.0
+    for encoding in CONTENT_ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """Compress a body with a content coding from CONTENT_ENCODINGS.
+    
+    best trades CPU time for size, for bodies that are compressed only once.
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if best else 5)
+    # wbits=31 writes the gzip container
+    compressor = zlib.compressobj(9 if best else 6, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+class EncodedBody:
+    """A response body and its compressed variants, each compressed at most once"""
+    
+    def __init__(self, body: bytes, etag: str, best: bool = False):
+        self.body = body
+        self.etag = etag
+        self.best = best
+        self._variants = {}
+    
+    def encoding_for(self, request: Request) -> Optional[str]:
+        """Content coding to send this body with, None for identity"""
+        if not RESPONSE_COMPRESSION or len(self.body) < COMPRESSION_MIN_SIZE:
             return None
+        return negotiate_encoding(request.headers.get("accept-encoding", ""))
+    
+    def etag_for(self, encoding: Optional[str]) -> str:
+        # Every representation needs its own strong ETag
+        if encoding is None:
+            return self.etag
+        return f'{self.etag[:-1]}-{encoding}"'
+    
+    def variant(self, encoding: Optional[str]) -> bytes:
+        """The body in a content coding, compressed on first use"""
+        if encoding is None:
+            return self.body
+        data = self._variants.get(encoding)
+        if data is None:
+            data = self._variants[encoding] = compress(self.body, encoding, self.best)
+        return data
+    
+    def precompress(self) -> "EncodedBody":
+        """Compress every variant up front"""
+        for encoding in CONTENT_ENCODINGS:
+            self.variant(encoding)
+        return self
+    
+    async def response(self, request: Request, media_type: str, headers: Optional[dict] = None) -> Response:
+        """Full or 304 response in the coding the client prefers"""
+        encoding = self.encoding_for(request)
+        etag = self.etag_for(encoding)
+        headers = {**(headers or {}), "ETag": etag, "Vary": "Accept-Encoding"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
         
-        # Use html.parser instead of lxml for Python 3.13 compatibility
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Look for login-related links
-        login_patterns = [
-            r'https?://[^/]*' + re.escape(app_name.lower()) + r'[^/]*/login',
-            r'https?://[^/]*' + re.escape(app_name.lower()) + r'[^/]*/signin',
-            r'https?://[^/]*' + re.escape(app_name.lower()) + r'[^/]*/auth',
-            r'https?://accounts\.' + re.escape(app_name.lower()),
-            r'https?://login\.' + re.escape(app_name.lower()),
-        ]
+        data = self._variants.get(encoding) if encoding is not None else self.body
+        if data is None:
+            # zlib and brotli release the GIL, so the event loop keeps running
+            data = await run_in_threadpool(self.variant, encoding)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(data, media_type=media_type, headers=headers)
+
+class SnapshotData(NamedTuple):
+    version: int
+    messages: List[dict]
+    body: EncodedBody
+    cursor: int
+    oldest_id: Optional[int]
+    etag: str
+    built_at: float
+
+class ConsoleSnapshot:
+    """Versioned in-memory copy of the serialized message list.
+    
+    process_incoming_data refreshes it after each commit, so GET requests
+    are served from memory, each compressed variant of the response body
+    built once per version. Writes made by other worker processes cannot
+    invalidate it, so a snapshot older than CONSOLE_SNAPSHOT_TTL seconds is
+    rebuilt from the database on the next read.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.data = None
+        self._started = 0     # generation of the last rebuild started
+        self._installed = 0   # generation of self.data
+        self._lock = threading.Lock()
+    
+    def fresh(self) -> Optional[SnapshotData]:
+        """The cached snapshot if it is younger than the TTL, else None"""
+        data = self.data
+        if data is not None and time.monotonic() - data.built_at < self.ttl:
+            return data
+        return None
+    
+    def refresh(self, db: Session) -> SnapshotData:
+        """Rebuild the snapshot from the database"""
+        # The lock only orders rebuilds and swaps the result, it is never held
+        # across database I/O: with the async engine every session runs on the
+        # event loop thread, where waiting for it would deadlock
+        with self._lock:
+            self._started += 1
+            generation = self._started
         
-        # Search in all links
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            for pattern in login_patterns:
-                if re.search(pattern, href, re.IGNORECASE):
-                    # Clean up Google redirect URLs
-                    if 'google.com/url?q=' in href:
-                        href = href.split('google.com/url?q=')[1].split('&')[0]
-                    return href
+        messages = get_messages_from_db(db)
+        # Serialized once per rebuild, the response body is only built when
+        # the content changed
+        messages_json = dumps_json(messages)
+        etag = make_etag(messages_json)
+        now = time.monotonic()
         
-        # Fallback: try common patterns
-        common_urls = [
-            f"https://www.{app_name.lower()}.com/login",
-            f"https://{app_name.lower()}.com/login",
-            f"https://accounts.{app_name.lower()}.com",
-            f"https://login.{app_name.lower()}.com",
-        ]
+        with self._lock:
+            if generation < self._installed:
+                # A rebuild that started later already installed newer data
+                return self.data
+            previous = self.data
+            if previous is not None and previous.etag == etag:
+                # Unchanged content keeps its version, only the age is reset
+                self.data = previous._replace(built_at=now)
+            else:
+                version = previous.version + 1 if previous is not None else 1
+                ids = [msg["id"] for msg in messages]
+                cursor, oldest_id = max(ids, default=0), min(ids, default=None)
+                body = EncodedBody(console_data_body(messages_json, cursor, oldest_id), etag)
+                self.data = SnapshotData(version, messages, body, cursor, oldest_id, etag, now)
+            self._installed = generation
+            return self.data
+
+console_snapshot = ConsoleSnapshot(CONSOLE_SNAPSHOT_TTL)
+
+def console_data_body(messages_json: bytes, cursor: int, oldest_id: Optional[int]) -> bytes:
+    """GET /api/console-data body around pre-serialized messages.
+    
+    The meta timestamp is when the snapshot was built, so the body (and its
+    compressed variants) stays the same for a whole snapshot version.
+    """
+    meta = {"status": "success", "timestamp": datetime.utcnow().isoformat()}
+    return b"".join([
+        b'{"meta":', dumps_json(meta),
+        b',"data":{"messages":', messages_json,
+        b',"cursor":', dumps_json(cursor),
+        b',"oldest_id":', dumps_json(oldest_id),
+        b'}}'
+    ])
+
+class Subscription:
+    """A stream client's bounded event queue, bound to its event loop"""
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+    
+    def put(self, event: dict):
+        # Runs on the subscriber's loop. A client that cannot keep up gets its
+        # backlog replaced by a single resync event instead of growing memory
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {"event": "resync", "data": {}}
+        self.queue.put_nowait(event)
+
+class MessageBroker:
+    """In-process fan-out of newly stored messages to stream subscribers"""
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+    
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+    
+    def subscribe(self) -> Subscription:
+        """Register a subscriber on the running event loop"""
+        subscription = Subscription(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def publish(self, data: dict, previous_id: int):
+        """Queue a messages event for every subscriber, from any thread.
         
-        for url in common_urls:
+        previous_id is the newest id stored before these messages; the event
+        does not hold older messages, even those another worker stored.
+        """
+        event = {"event": "messages", "data": data, "id": data["cursor"], "previous_id": previous_id}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
             try:
-                test_response = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
-                if test_response.status_code < 400:
-                    return url
-            except:
-                continue
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # Subscriber's loop is closed
+                self.unsubscribe(subscription)
+
+message_broker = MessageBroker(STREAM_QUEUE_SIZE)
+
+def format_sse(event: dict) -> str:
+    """Encode an event as a Server-Sent Events frame"""
+    frame = f"event: {event['event']}\n"
+    if event.get("id") is not None:
+        frame += f"id: {event['id']}\n"
+    return frame + f"data: {json.dumps(event['data'])}\n\n"
+
+async def messages_event_since(cursor: int) -> dict:
+    """Stream event with the messages stored after cursor, read from the database"""
+    messages, latest_id, oldest_id = await run_db(lambda db: get_messages_since(db, cursor))
+    return {
+        "event": "messages",
+        "id": latest_id,
+        "data": {"messages": messages, "cursor": latest_id, "oldest_id": oldest_id}
+    }
+
+CRAWL_ACTIVE = ("queued", "running")
+
+def stale_origin_filter(now: datetime):
+    """Origins never crawled, or whose last result is older than its TTL"""
+    return or_(
+        Origin.url_checked.is_(None),
+        and_(Origin.login_url.isnot(None),
+             Origin.url_checked < now - timedelta(hours=CRAWL_FOUND_TTL_HOURS)),
+        and_(Origin.login_url.is_(None),
+             Origin.url_checked < now - timedelta(hours=CRAWL_NOT_FOUND_TTL_HOURS)),
+    )
+
+def enqueue_crawl_jobs(db: Session, force: bool = False) -> int:
+    """Queue a crawl job for every stale origin that has none in flight, return how many.
+    
+    With force every origin is queued, however recently it was crawled.
+    """
+    jobs = CrawlJob.__table__
+    now = datetime.utcnow()
+    db.execute(jobs.delete().where(
+        jobs.c.status.notin_(CRAWL_ACTIVE),
+        jobs.c.updated_at < now - timedelta(hours=CRAWL_JOB_RETENTION_HOURS)
+    ))
+    
+    # A single INSERT ... SELECT, so repeated clicks cannot queue an origin twice
+    in_flight = select(jobs.c.id).where(jobs.c.origin_id == Origin.id, jobs.c.status.in_(CRAWL_ACTIVE))
+    pending = select(
+        Origin.id, Origin.app_name, literal("queued"), literal(0),
+        literal(now, DateTime), literal(now, DateTime), literal(now, DateTime)
+    ).where(~in_flight.exists())
+    if not force:
+        pending = pending.where(stale_origin_filter(now))
+    result = db.execute(insert(jobs).from_select(
+        ["origin_id", "app_name", "status", "attempts", "next_attempt_at", "created_at", "updated_at"],
+        pending
+    ))
+    db.commit()
+    return result.rowcount
+
+def claim_crawl_job(db: Session):
+    """Mark the next due queued job as running and return it, None if there is none"""
+    jobs = CrawlJob.__table__
+    while True:
+        now = datetime.utcnow()
+        job = db.execute(
+            select(jobs.c.id, jobs.c.origin_id, jobs.c.app_name, jobs.c.attempts)
+            .where(jobs.c.status == "queued", jobs.c.next_attempt_at <= now)
+            .order_by(jobs.c.next_attempt_at, jobs.c.id)
+            .limit(1)
+        ).first()
+        if job is None:
+            return None
         
-        return None
-    except Exception as e:
-        print(f"Error finding login URL for {app_name}: {e}")
-        return None
+        # Conditional UPDATE: only one worker (or process) wins the job. The
+        # attempts check stops a late claim of a job that already failed and
+        # was queued again in between
+        claimed = db.execute(
+            jobs.update()
+            .where(jobs.c.id == job.id, jobs.c.status == "queued", jobs.c.attempts == job.attempts)
+            .values(status="running", attempts=jobs.c.attempts + 1, updated_at=now)
+        ).rowcount
+        db.commit()
+        if claimed:
+            return job
 
-def crawl_origin_url(origin_id: int, db: Session):
-    """Background task to crawl and update origin URL"""
-    origin = db.query(Origin).filter(Origin.id == origin_id).first()
-    if not origin:
-        return
+class CrawlResult(NamedTuple):
+    job: Any
+    login_url: Optional[str] = None
+    error: Optional[str] = None
+
+def save_crawl_results(db: Session, results: List[CrawlResult]):
+    """Store finished crawls in one transaction, one executemany UPDATE per table.
+    
+    Found / not found results update their origin and finish the job. Errors
+    queue the job again with exponential backoff, or mark it failed after
+    CRAWL_MAX_ATTEMPTS.
+    """
+    origins = Origin.__table__
+    jobs = CrawlJob.__table__
+    now = datetime.utcnow()
     
-    login_url = find_login_url(origin.app_name)
-    origin.login_url = login_url
-    origin.url_checked = datetime.utcnow()
+    origin_rows = []
+    job_rows = []
+    for result in results:
+        job_row = {"job_id": result.job.id, "job_status": "done", "job_error": None, "job_next_attempt": now}
+        if result.error is None:
+            origin_rows.append({"origin_id": result.job.origin_id, "origin_login_url": result.login_url})
+            print(f"Crawled {result.job.app_name}: {result.login_url or 'Not found'}")
+        else:
+            attempts = result.job.attempts + 1
+            job_row["job_error"] = result.error
+            if attempts >= CRAWL_MAX_ATTEMPTS:
+                job_row["job_status"] = "failed"
+            else:
+                job_row["job_status"] = "queued"
+                job_row["job_next_attempt"] = now + timedelta(seconds=CRAWL_RETRY_SECONDS * 2 ** (attempts - 1))
+        job_rows.append(job_row)
+    
+    if origin_rows:
+        db.execute(
+            origins.update().where(origins.c.id == bindparam("origin_id")).values(
+                login_url=bindparam("origin_login_url"), url_checked=now, updated_at=now
+            ),
+            origin_rows
+        )
+    db.execute(
+        jobs.update().where(jobs.c.id == bindparam("job_id")).values(
+            status=bindparam("job_status"), last_error=bindparam("job_error"),
+            next_attempt_at=bindparam("job_next_attempt"), updated_at=now
+        ),
+        job_rows
+    )
+    db.commit()
+
+def requeue_running_crawl_jobs(db: Session):
+    """Queue jobs again that were running when the app last stopped"""
+    # With several worker processes this can requeue a job another process is
+    # still running, which only costs a second crawl of that origin
+    jobs = CrawlJob.__table__
+    db.execute(jobs.update().where(jobs.c.status == "running").values(status="queued"))
     db.commit()
-    print(f"Crawled {origin.app_name}: {login_url or 'Not found'}")
+
+def get_crawl_progress(db: Session):
+    jobs = CrawlJob.__table__
+    counts = dict(db.execute(select(jobs.c.status, func.count()).group_by(jobs.c.status)).all())
+    active_origins = db.execute(select(jobs.c.origin_id).where(jobs.c.status.in_(CRAWL_ACTIVE))).scalars().all()
+    return {
+        "counts": {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")},
+        "active": len(active_origins),
+        "active_origins": active_origins
+    }
+
+class CrawlWorkerPool:
+    """asyncio workers that claim crawl jobs and run them on one shared crawler"""
+    
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._tasks = []
+        self._writer = None
+        self._results = None
+        self._crawler = None
+        self._wakeup = None
+    
+    async def start(self):
+        """Start the workers on the running event loop, no-op if already started"""
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._results = asyncio.Queue()
+        self._crawler = await LoginUrlCrawler(
+            CRAWL_CONCURRENCY, CRAWL_PER_HOST_CONCURRENCY, parse_workers=CRAWL_PARSE_WORKERS
+        ).open()
+        self._writer = asyncio.ensure_future(self._write_results())
+        self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+    
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
+        # Write what is still queued, jobs lost on the way are queued again at startup
+        if self._writer is not None:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+            while not self._results.empty():
+                results = self._take_results(CRAWL_RESULT_BATCH)
+                await run_db(lambda db: save_crawl_results(db, results))
+        
+        if self._crawler is not None:
+            await self._crawler.close()
+            self._crawler = None
+    
+    def wake(self):
+        """Tell idle workers that jobs were queued"""
+        if self._wakeup is not None:
+            # Workers wait on the event they saw before claiming, so none misses this
+            self._wakeup.set()
+            self._wakeup = asyncio.Event()
+    
+    async def _work(self):
+        while True:
+            wakeup = self._wakeup
+            try:
+                job = await run_db(claim_crawl_job)
+                if job is not None:
+                    await self._run(job)
+                    continue
+            except Exception as e:
+                print(f"Crawl worker error: {e}")
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=CRAWL_IDLE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    
+    async def _run(self, job):
+        try:
+            result = CrawlResult(job, login_url=await self._crawler.find_login_url(job.app_name))
+        except Exception as e:
+            print(f"Error finding login URL for {job.app_name}: {e}")
+            result = CrawlResult(job, error=str(e))
+        self._results.put_nowait(result)
+    
+    def _take_results(self, limit: int) -> List[CrawlResult]:
+        results = []
+        while len(results) < limit and not self._results.empty():
+            results.append(self._results.get_nowait())
+        return results
+    
+    async def _write_results(self):
+        """Write finished crawls in batches instead of one commit per origin"""
+        while True:
+            first = await self._results.get()
+            # Let more crawls finish, they go in the same transaction
+            try:
+                await asyncio.sleep(CRAWL_RESULT_FLUSH_SECONDS)
+            except asyncio.CancelledError:
+                # Stopping: leave it for the final write in stop()
+                self._results.put_nowait(first)
+                raise
+            results = [first] + self._take_results(CRAWL_RESULT_BATCH - 1)
+            try:
+                await run_db(lambda db: save_crawl_results(db, results))
+            except Exception as e:
+                print(f"Error saving crawl results: {e}")
+
+crawl_workers = CrawlWorkerPool(CRAWL_WORKERS)
 
 # API Endpoints
-@app.post("/api/console-data")
-async def post_console_data(payload: ConsoleDataPayload, db: Session = Depends(get_db)):
+# The body is validated by parse_console_payload, not by FastAPI, so its
+# schema is added to the OpenAPI docs by hand
+@app.post("/api/console-data", openapi_extra={"requestBody": {
+    "required": True,
+    "content": {"application/json": {"schema": inline_json_schema(ConsoleDataPayload)}},
+}})
+async def post_console_data(request: Request):
     """
     Receive console data from external source and store in database.
     Payload should match the format: {"meta": {...}, "data": {"messages": [...]}}
+    (see ConsoleDataPayload), invalid payloads get the usual 422 response.
     """
     try:
-        process_incoming_data(payload, db)
+        payload = parse_console_payload(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
+    
+    try:
+        inserted = await run_db(lambda db: process_incoming_data(payload, db))
         return {
             "status": "success",
             "message": "Data stored successfully",
-            "count": len(payload.data.get("messages", []))
+            "count": len(payload.data.messages),
+            "inserted": inserted
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/console-data", response_model=ConsoleDataResponse)
-async def get_console_data(db: Session = Depends(get_db)):
-    """Get console data from local database"""
+@app.get("/api/console-data", response_model=ConsoleDataResponse, response_class=FastJSONResponse)
+async def get_console_data(request: Request,
+                           since: Optional[int] = None,
+                           limit: Optional[int] = Query(None, ge=1, le=MESSAGE_PAGE_MAX),
+                           before_id: Optional[int] = None,
+                           app_name: Optional[str] = None,
+                           carrier: Optional[str] = None):
+    """Get console data from local database.
+    
+    With `since` only messages stored after that cursor are returned, along
+    with the next `cursor` and the `oldest_id` still stored.
+    With `limit`, `before_id`, `app_name` or `carrier` one page of matching
+    messages is returned, along with `next_before_id` for the next page.
+    """
     try:
-        messages = get_messages_from_db(db)
-        
-        return {
-            "meta": {
-                "status": "success",
-                "timestamp": datetime.utcnow().isoformat()
-            },
-            "data": {
-                "messages": messages
-            }
+        meta = {
+            "status": "success",
+            "timestamp": datetime.utcnow().isoformat()
         }
+        
+        if since is not None:
+            messages, cursor, oldest_id = await run_db(
+                lambda db: get_messages_since(db, since, app_name, carrier)
+            )
+            return FastJSONResponse({
+                "meta": meta,
+                "data": {
+                    "messages": messages,
+                    "cursor": cursor,
+                    "oldest_id": oldest_id
+                }
+            })
+        
+        if limit is not None or before_id is not None or app_name is not None or carrier is not None:
+            messages, next_before_id = await run_db(
+                lambda db: get_messages_page(db, limit or MESSAGE_PAGE_SIZE, before_id, app_name, carrier)
+            )
+            return FastJSONResponse({
+                "meta": meta,
+                "data": {
+                    "messages": messages,
+                    "next_before_id": next_before_id
+                }
+            })
+        
+        snapshot = console_snapshot.fresh() or await run_db(console_snapshot.refresh)
+        return await snapshot.body.response(
+            request, FastJSONResponse.media_type, {"Cache-Control": "no-cache"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/origins")
-async def get_origins(db: Session = Depends(get_db)):
+@app.get("/api/console-data/stream")
+async def stream_console_data(request: Request):
+    """
+    Push newly stored messages as Server-Sent Events.
+    Each `messages` event has the same shape as a `?since=` delta response;
+    `heartbeat` events are sent while idle and `resync` asks the client to
+    reload everything after it fell behind or the data was reset.
+    """
+    subscription = message_broker.subscribe()
+    last_event_id = request.headers.get("last-event-id", "")
+    
+    async def event_stream():
+        try:
+            if last_event_id.isdigit():
+                # Reconnecting client: send what it missed while disconnected
+                event = await messages_event_since(int(last_event_id))
+                cursor = event["id"]
+                yield f"retry: {STREAM_RETRY_MS}\n\n" + format_sse(event)
+            else:
+                cursor = await run_db(lambda db: db.execute(select(func.max(Message.id))).scalar() or 0)
+                yield f"retry: {STREAM_RETRY_MS}\n\n"
+            
+            idle_since = time.monotonic()
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=STREAM_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    # Catch up on messages posted to other worker processes
+                    event = await messages_event_since(cursor)
+                    if event["id"] < cursor:
+                        # The data was reset, the client reloads everything
+                        cursor = event["id"]
+                        event = {"event": "resync", "data": {}}
+                    elif event["id"] == cursor:
+                        if time.monotonic() - idle_since < STREAM_HEARTBEAT_SECONDS:
+                            continue
+                        event = {"event": "heartbeat", "data": {}}
+                
+                if event["event"] == "messages":
+                    # Skip what a catch-up read already sent (broker events are
+                    # shared between subscribers, so copy instead of editing)
+                    if event["id"] <= cursor:
+                        continue
+                    if event.get("previous_id", 0) > cursor:
+                        # Another worker stored messages the stream has not
+                        # sent yet, they are only in the database
+                        event = await messages_event_since(cursor)
+                    else:
+                        data = event["data"]
+                        event = {**event, "data": {**data, "messages": [msg for msg in data["messages"] if msg["id"] > cursor]}}
+                    cursor = event["id"]
+                idle_since = time.monotonic()
+                yield format_sse(event)
+        finally:
+            message_broker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/origins", response_class=FastJSONResponse)
+async def get_origins(request: Request):
     """Get all unique origins"""
     try:
-        origins = db.query(Origin).order_by(Origin.app_name).all()
-        return {
-            "status": "success",
-            "origins": [
-                {
-                    "id": origin.id,
-                    "app_name": origin.app_name,
-                    "login_url": origin.login_url,
-                    "url_checked": origin.url_checked.isoformat() if origin.url_checked else None,
-                    "color": origin.color
-                }
-                for origin in origins
-            ]
-        }
+        origins_json = dumps_json(await run_db(get_origins_from_db))
+        etag = make_etag(origins_json)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        return FastJSONResponse(
+            b'{"status":"success","origins":' + origins_json + b'}',
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/origins/check-all")
-async def check_all_origins(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    """Start crawling all origins to find login URLs"""
+async def check_all_origins(force: bool = False):
+    """Queue crawl jobs for origins to find login URLs.
+    
+    Origins crawled within CRAWL_FOUND_TTL_HOURS (login URL found) or
+    CRAWL_NOT_FOUND_TTL_HOURS (not found) are skipped unless `force` is set.
+    """
     try:
-        origins = db.query(Origin).all()
+        queued = await run_db(lambda db: enqueue_crawl_jobs(db, force))
         
-        for origin in origins:
-            # Add background task for each origin
-            background_tasks.add_task(crawl_origin_url, origin.id, db)
+        # Workers normally start with the app, this covers servers without startup events
+        await crawl_workers.start()
+        crawl_workers.wake()
         
         return {
             "status": "success",
-            "message": f"Started crawling {len(origins)} origins",
-            "count": len(origins)
+            "message": f"Started crawling {queued} origins",
+            "count": queued
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/crawl-jobs")
+async def get_crawl_jobs():
+    """Crawl job progress: jobs per status and the origins still being crawled"""
+    try:
+        progress = await run_db(get_crawl_progress)
+        return {"status": "success", **progress}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.on_event("startup")
+async def start_crawl_workers():
+    await run_db(requeue_running_crawl_jobs)
+    await crawl_workers.start()
+
+@app.on_event("shutdown")
+async def stop_crawl_workers():
+    await crawl_workers.stop()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # Serve static files (for frontend)
 # Use absolute path to ensure it works in different environments (local, Render, etc.)
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 
+# /static/... references in HTML assets, rewritten to versioned URLs
+STATIC_REFERENCE = re.compile(r"""(?<=["'(])/static/([^"'?#()\s]+)(?=["')])""")
+
+class StaticAsset(NamedTuple):
+    body: EncodedBody
+    media_type: str
+    mtime_ns: int
+    last_modified: str
+    version: str
+
+class StaticAssets:
+    """Files under a directory, served from memory.
+    
+    Every file is read and compressed once at load, and HTML files link the
+    other assets by versioned URL (?v=<content hash>), so browsers can cache
+    those for STATIC_MAX_AGE and revalidate only the page itself. In dev
+    mode each request checks the file's mtime and reloads it when it changed.
+    """
+    
+    def __init__(self, directory: str, dev_mode: bool = False):
+        self.directory = os.path.realpath(directory)
+        self.dev_mode = dev_mode
+        self._assets = {}
+        self._lock = threading.Lock()
+    
+    def load_all(self) -> "StaticAssets":
+        """Load every file, HTML last so it can link the others by version"""
+        paths = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                paths.append(os.path.relpath(os.path.join(root, name), self.directory).replace(os.sep, "/"))
+        paths.sort(key=lambda path: (path.endswith(".html"), path))
+        for path in paths:
+            self._load(path)
+        return self
+    
+    def _full_path(self, path: str) -> Optional[str]:
+        full_path = os.path.realpath(os.path.join(self.directory, path))
+        if not full_path.startswith(self.directory + os.sep):
+            return None
+        return full_path
+    
+    def _load(self, path: str) -> Optional[StaticAsset]:
+        full_path = self._full_path(path)
+        if full_path is None:
+            return None
+        try:
+            with open(full_path, "rb") as f:
+                mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+                body = f.read()
+        except OSError:
+            # Deleted or unreadable
+            with self._lock:
+                self._assets.pop(path, None)
+            return None
+        
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if media_type.startswith("text/") or media_type in ("application/javascript", "application/json"):
+            media_type += "; charset=utf-8"
+        if media_type.startswith("text/html"):
+            body = STATIC_REFERENCE.sub(lambda match: self.url(match.group(1)), body.decode("utf-8")).encode("utf-8")
+        
+        etag = make_etag(body)
+        encoded = EncodedBody(body, etag, best=not self.dev_mode)
+        if not self.dev_mode:
+            encoded.precompress()
+        asset = StaticAsset(
+            encoded, media_type, mtime_ns, formatdate(mtime_ns / 1e9, usegmt=True), etag[1:13]
+        )
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+    
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """The asset at a path relative to the directory, None if there is none"""
+        asset = self._assets.get(path)
+        if not self.dev_mode:
+            return asset
+        
+        full_path = self._full_path(path)
+        try:
+            mtime_ns = os.stat(full_path).st_mtime_ns if full_path is not None else None
+        except OSError:
+            mtime_ns = None
+        if asset is not None and asset.mtime_ns == mtime_ns:
+            return asset
+        return self._load(path) if mtime_ns is not None else None
+    
+    def url(self, path: str) -> str:
+        """/static URL of an asset, versioned by content hash when it is loaded"""
+        asset = self._assets.get(path)
+        if asset is None:
+            return f"/static/{path}"
+        return f"/static/{path}?v={asset.version}"
+    
+    async def response(self, request: Request, asset: StaticAsset, cache_control: str) -> Response:
+        """Full or 304 response, honoring If-None-Match and If-Modified-Since"""
+        headers = {"Cache-Control": cache_control, "Last-Modified": asset.last_modified}
+        # If-Modified-Since is only used by clients that send no ETag
+        since = request.headers.get("if-modified-since")
+        if since and "if-none-match" not in request.headers:
+            try:
+                unchanged = parsedate_to_datetime(since).timestamp() >= asset.mtime_ns // 10**9
+            except (TypeError, ValueError):
+                unchanged = False
+            if unchanged:
+                encoding = asset.body.encoding_for(request)
+                headers.update({"ETag": asset.body.etag_for(encoding), "Vary": "Accept-Encoding"})
+                return Response(status_code=304, headers=headers)
+        return await asset.body.response(request, asset.media_type, headers)
+
+static_assets = StaticAssets(static_dir, STATIC_DEV_MODE)
+if os.path.isdir(static_dir) and not PARSE_WORKER_PROCESS:
+    static_assets.load_all()
+
 # Root route to serve index.html
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Root endpoint - serves index.html"""
-    index_path = os.path.join(static_dir, "index.html")
-    if os.path.exists(index_path):
-        from fastapi.responses import FileResponse
-        return FileResponse(index_path, media_type="text/html")
+    asset = static_assets.get("index.html")
+    if asset is not None:
+        # Revalidated on every load, a 304 while it is unchanged
+        return await static_assets.response(request, asset, "no-cache")
     # Fallback if static files don't exist
     return {
         "message": "Console App API",
@@ -353,12 +1530,19 @@ async def root():
         }
     }
 
-# Mount static files directory for other static assets (CSS, JS, images, etc.)
-if os.path.exists(static_dir):
-    try:
-        app.mount("/static", StaticFiles(directory=static_dir), name="static_files")
-    except Exception as e:
-        print(f"Warning: Could not mount static files: {e}")
+# Other static assets (CSS, JS, images, etc.)
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def static_file(path: str, request: Request, v: Optional[str] = None):
+    """Serve a dashboard asset from memory"""
+    asset = static_assets.get(path)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if v == asset.version and not static_assets.dev_mode:
+        # The URL changes with the content, so it never needs revalidating
+        cache_control = f"public, max-age={STATIC_MAX_AGE}, immutable"
+    else:
+        cache_control = "no-cache"
+    return await static_assets.response(request, asset, cache_control)
 
 if __name__ == "__main__":
     import uvicorn
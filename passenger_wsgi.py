@@ -54,6 +54,10 @@ try:
 except:
     pass  # Don't fail if we can't write debug file
 
+# Passenger has no long-lived event loop for the async database engine,
+# keep database work on the sync engine (run in the threadpool)
+os.environ['DB_ASYNC'] = '0'
+
 # Import the FastAPI app
 try:
     from main import app
@@ -107,4 +111,4 @@ def application(environ, start_response):
         except:
             pass
         # Re-raise to let Passenger handle it
-        raise
\ No newline at end of file
+        raise
\ No newline at end of file
@@ -0,0 +1,132 @@
+"""
+Tests for the login URL crawler against a local stub HTTP server.
+
+Run with: python -m pytest test_crawler.py
+"""
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from crawler import CrawlError, LoginUrlCrawler
+
+SEARCH_PAGES = {
+    "acme": '<a href="https://www.acme.example/">Acme</a>'
+            '<a href="https://www.acme.example/signin">Sign in</a>',
+}
+EXISTING = {"/beta/login", "/gamma/login"}
+SLOW_PROBE = 0.3
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def _track(self, delta):
+        with StubHandler.lock:
+            StubHandler.active += delta
+            StubHandler.peak = max(StubHandler.peak, StubHandler.active)
+
+    def do_GET(self):
+        app = self.path.split("q=")[1].split("+")[0].lower()
+        body = SEARCH_PAGES.get(app, "<p>No results</p>").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._track(1)
+        try:
+            time.sleep(SLOW_PROBE)
+            self.send_response(200 if self.path in EXISTING else 404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        finally:
+            self._track(-1)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_crawler(base, **kwargs):
+    return LoginUrlCrawler(
+        search_url=base + "/search?q={query}",
+        candidate_urls=[base + "/{app}/signin", base + "/{app}/login"],
+        **kwargs
+    )
+
+
+def with_server(test):
+    def run():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            asyncio.run(test(f"http://127.0.0.1:{server.server_address[1]}"))
+        finally:
+            server.shutdown()
+            server.server_close()
+    run.__name__ = test.__name__
+    return run
+
+
+@with_server
+async def test_search_result_wins(base):
+    async with make_crawler(base) as crawler:
+        assert await crawler.find_login_url("Acme") == "https://www.acme.example/signin"
+
+
+@with_server
+async def test_search_parsed_in_process_pool(base):
+    async with make_crawler(base, parse_workers=2, parse_queue_size=1) as crawler:
+        results = await asyncio.gather(*(crawler.find_login_url("Acme") for _ in range(4)))
+    assert results == ["https://www.acme.example/signin"] * 4
+
+
+@with_server
+async def test_probes_run_concurrently_in_candidate_order(base):
+    async with make_crawler(base) as crawler:
+        start = time.perf_counter()
+        assert await crawler.find_login_url("Beta") == base + "/beta/login"
+        # Both probes are slow, together they take about as long as one
+        assert time.perf_counter() - start < SLOW_PROBE * 1.8
+
+
+@with_server
+async def test_not_found(base):
+    async with make_crawler(base) as crawler:
+        assert await crawler.find_login_url("Nothing") is None
+
+
+@with_server
+async def test_concurrent_crawls_respect_per_host_limit(base):
+    StubHandler.peak = 0
+    apps = ["Beta", "Gamma", "Delta", "Nothing"]
+    async with make_crawler(base, per_host_concurrency=3) as crawler:
+        results = await asyncio.gather(*(crawler.find_login_url(app) for app in apps))
+    assert results == [base + "/beta/login", base + "/gamma/login", None, None]
+    assert StubHandler.peak <= 3
+
+
+@with_server
+async def test_invalid_candidate_url_is_not_found(base):
+    # "http://nothing:x/login" has an invalid port
+    async with make_crawler(base) as crawler:
+        crawler.candidate_urls = ["http://{app}/login"] + crawler.candidate_urls
+        assert await crawler.find_login_url("Nothing:x") is None
+
+
+def test_unreachable_host_raises_crawl_error():
+    async def crawl():
+        # Nothing listens on port 9 (discard) on the loopback interface
+        async with make_crawler("http://127.0.0.1:9", probe_timeout=1.0, search_timeout=1.0) as crawler:
+            await crawler.find_login_url("Acme")
+
+    try:
+        asyncio.run(crawl())
+    except CrawlError:
+        pass
+    else:
+        raise AssertionError("CrawlError not raised")
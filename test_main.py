@@ -0,0 +1,507 @@
+"""
+Tests for the API in main.py against a temporary SQLite database.
+
+Run with: python -m pytest test_main.py
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+_tmp_dir = tempfile.mkdtemp(prefix="console-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+import main  # noqa: E402
+from main import (  # noqa: E402
+    CONTENT_ENCODINGS, CrawlJob, CrawlResult, Message, MessageKey, Origin, SessionLocal,
+    claim_crawl_job, enqueue_crawl_jobs, negotiate_encoding, save_crawl_results
+)
+
+# No `with`: the startup handlers (crawl workers) are not run
+client = TestClient(main.app)
+
+
+@pytest.fixture(autouse=True)
+def empty_database(monkeypatch):
+    monkeypatch.setattr(main, "MESSAGE_RETENTION_HOURS", 24)
+    monkeypatch.setattr(main, "MESSAGE_MAX_ROWS", 5000)
+    with main.engine.begin() as conn:
+        for table in (Message, MessageKey, Origin, CrawlJob):
+            conn.execute(table.__table__.delete())
+    main.console_snapshot.data = None
+    yield
+
+
+def message(i, **fields):
+    return {"app_name": "Acme", "carrier": f"2367{i:04d}XXX", "sms": f"Code {i}", "time": f"{i} min ago", **fields}
+
+
+def post(messages):
+    response = client.post("/api/console-data", json={"meta": {}, "data": {"messages": messages}})
+    assert response.status_code == 200, response.text
+    return response.json()["inserted"]
+
+
+def stored():
+    with SessionLocal() as db:
+        return [row[0] for row in db.query(Message.sms).order_by(Message.id)]
+
+
+def test_reposted_snapshot_is_stored_once():
+    snapshot = [message(i) for i in range(3)]
+    assert [post(snapshot) for _ in range(3)] == [3, 0, 0]
+    assert post(snapshot + [message(3)]) == 1
+    assert stored() == ["Code 0", "Code 1", "Code 2", "Code 3"]
+
+
+def test_row_cap_does_not_bring_back_evicted_messages(monkeypatch):
+    monkeypatch.setattr(main, "MESSAGE_MAX_ROWS", 5)
+    snapshot = [message(i) for i in range(8)]
+    assert [post(snapshot) for _ in range(3)] == [8, 0, 0]
+    assert stored() == [f"Code {i}" for i in range(3, 8)]
+
+
+def test_expired_message_still_posted_is_not_stored_again(monkeypatch):
+    monkeypatch.setattr(main, "MESSAGE_RETENTION_HOURS", 0.5 / 3600)
+    inserted = []
+    for _ in range(5):
+        inserted.append(post([message(1)]))
+        time.sleep(0.3)
+    assert inserted == [1, 0, 0, 0, 0]
+
+
+def test_expired_keys_are_dropped(monkeypatch):
+    monkeypatch.setattr(main, "MESSAGE_KEY_RETENTION_HOURS", 0.2 / 3600)
+    assert post([message(1)]) == 1
+    time.sleep(0.3)
+    assert post([message(2)]) == 1
+    with SessionLocal() as db:
+        assert db.query(MessageKey).count() == 1
+
+
+def test_reposted_snapshot_writes_no_keys():
+    keys = [main.message_key("Acme", f"2367{i:04d}XXX", f"Code {i}", f"{i} min ago") for i in range(50)]
+    assert post([message(i) for i in range(50)]) == 50
+    with SessionLocal() as db:
+        sqlite_connection = db.connection().connection.driver_connection
+        changes = sqlite_connection.total_changes
+        assert main.claim_message_keys(db, keys) == set()
+        assert sqlite_connection.total_changes == changes
+
+
+def test_keys_still_posted_are_kept(monkeypatch):
+    monkeypatch.setattr(main, "MESSAGE_KEY_RETENTION_HOURS", 0.4 / 3600)
+    inserted = []
+    # Each repost is within the retention, the key never expires
+    for _ in range(6):
+        inserted.append(post([message(1)]))
+        time.sleep(0.15)
+    assert inserted == [1, 0, 0, 0, 0, 0]
+
+
+def test_null_carrier_is_stored_once():
+    assert [post([message(1, carrier=None)]) for _ in range(3)] == [1, 0, 0]
+    assert stored() == ["Code 1"]
+
+
+def async_sessions():
+    """AsyncSession factory like DB_ASYNC=1 creates, None without aiosqlite"""
+    try:
+        import aiosqlite  # noqa: F401
+        from sqlalchemy import event
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+        from sqlalchemy.orm import sessionmaker
+    except ImportError:
+        return None
+    async_engine = create_async_engine(main.engine.url.set(drivername="sqlite+aiosqlite"))
+    event.listen(async_engine.sync_engine, "connect", main.apply_sqlite_pragmas)
+    return sessionmaker(async_engine, class_=AsyncSession, autoflush=False)
+
+
+@pytest.mark.parametrize("engine", ["threadpool", "async"])
+def test_concurrent_identical_posts_store_once(engine, monkeypatch):
+    if engine == "async":
+        sessions = async_sessions()
+        if sessions is None:
+            pytest.skip("aiosqlite not installed")
+        monkeypatch.setattr(main, "AsyncSessionLocal", sessions)
+    body = {"meta": {}, "data": {"messages": [message(i) for i in range(200)]}}
+
+    async def post_all():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.post("/api/console-data", json=body) for _ in range(8)))
+
+    responses = asyncio.run(post_all())
+    assert [response.status_code for response in responses] == [200] * 8
+    assert sum(response.json()["inserted"] for response in responses) == 200
+    assert len(stored()) == 200
+
+
+def test_many_apps_fit_old_sqlite_variable_limit():
+    apps = [f"App{i}" for i in range(300)]
+    with SessionLocal() as db:
+        sqlite_connection = db.connection().connection.driver_connection
+        if not hasattr(sqlite_connection, "setlimit"):
+            pytest.skip("sqlite3 setlimit needs Python 3.11")
+        # Older SQLite builds allow 999 variables per statement
+        old_limit = sqlite_connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        try:
+            main.upsert_origins(db, {app: "#123456" for app in apps})
+            main.upsert_origins(db, {app: "#654321" for app in apps})
+            db.commit()
+        finally:
+            sqlite_connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, old_limit)
+        assert dict(db.query(Origin.app_name, Origin.color)) == {app: "#654321" for app in apps}
+
+
+def test_null_app_name_is_unknown():
+    assert post([message(1, app_name=None), message(2, app_name=None, sms="Acme: Code 2")]) == 2
+    with SessionLocal() as db:
+        assert sorted(row[0] for row in db.query(Message.app_name)) == ["Acme", "Unknown"]
+        assert sorted(row[0] for row in db.query(Origin.app_name)) == ["Acme", "Unknown"]
+    assert post([message(1, app_name=None)]) == 0
+
+
+async def open_stream():
+    async def receive():
+        await asyncio.sleep(3600)
+
+    scope = {"type": "http", "method": "GET", "path": "/api/console-data/stream", "headers": [], "query_string": b""}
+    response = await main.stream_console_data(main.Request(scope, receive))
+    frames = response.body_iterator
+    assert (await frames.__anext__()).startswith("retry:")
+    return frames
+
+
+def test_stream_picks_up_messages_stored_by_another_worker(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_POLL_SECONDS", 0.1)
+    post([message(1)])
+
+    async def read_stream():
+        frames = await open_stream()
+        # Another worker process stores messages: no in-process event, only the database
+        with main.engine.begin() as conn:
+            conn.execute(Message.__table__.insert(), [
+                {"app_name": "Acme", "sms": f"Code {i}", "created_at": main.datetime.utcnow()} for i in (2, 3)
+            ])
+        frame = await asyncio.wait_for(frames.__anext__(), timeout=2)
+        await frames.aclose()
+        return frame
+
+    frame = asyncio.run(read_stream())
+    assert frame.startswith("event: messages\n")
+    assert '"Code 3"' in frame and '"Code 2"' in frame and '"Code 1"' not in frame
+
+
+def test_stream_keeps_other_workers_messages_before_a_local_post(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_POLL_SECONDS", 30)
+    post([message(1)])
+
+    async def read_stream():
+        frames = await open_stream()
+        # Another worker stores messages, then a POST to this worker comes in
+        # before the stream's next catch-up read
+        with main.engine.begin() as conn:
+            conn.execute(Message.__table__.insert(), [
+                {"app_name": "Acme", "sms": f"Code {i}", "created_at": main.datetime.utcnow()} for i in (2, 3)
+            ])
+        await asyncio.get_running_loop().run_in_executor(None, post, [message(4)])
+        frame = await asyncio.wait_for(frames.__anext__(), timeout=2)
+        await frames.aclose()
+        return frame
+
+    frame = asyncio.run(read_stream())
+    assert frame.startswith("event: messages\n")
+    assert all(f'"Code {i}"' in frame for i in (2, 3, 4)) and '"Code 1"' not in frame
+
+
+def test_stream_sends_in_process_messages_once(monkeypatch):
+    monkeypatch.setattr(main, "STREAM_POLL_SECONDS", 0.1)
+    monkeypatch.setattr(main, "STREAM_HEARTBEAT_SECONDS", 0.5)
+
+    async def read_stream():
+        frames = await open_stream()
+        await asyncio.get_running_loop().run_in_executor(None, post, [message(1)])
+        first = await asyncio.wait_for(frames.__anext__(), timeout=2)
+        # The catch-up reads in between find nothing new
+        second = await asyncio.wait_for(frames.__anext__(), timeout=2)
+        await frames.aclose()
+        return first, second
+
+    first, second = asyncio.run(read_stream())
+    assert first.startswith("event: messages\n") and '"Code 1"' in first
+    assert second.startswith("event: heartbeat\n")
+
+
+def test_openapi_documents_the_request_body():
+    operation = client.get("/openapi.json").json()["paths"]["/api/console-data"]["post"]
+    schema = operation["requestBody"]["content"]["application/json"]["schema"]
+    message_schema = schema["properties"]["data"]["properties"]["messages"]["items"]
+    assert set(message_schema["properties"]) >= {"app_name", "carrier", "sms", "time", "color"}
+    # Static assets are not API operations
+    assert not any(path.startswith("/static") for path in client.get("/openapi.json").json()["paths"])
+
+
+def get_data(**params):
+    response = client.get("/api/console-data", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()["data"]
+
+
+def test_since_returns_only_new_messages():
+    post([message(i) for i in range(3)])
+    full = get_data()
+    assert [m["sms"] for m in full["messages"]] == ["Code 2", "Code 1", "Code 0"]
+    assert full["cursor"] == full["messages"][0]["id"]
+    assert full["oldest_id"] == full["messages"][-1]["id"]
+    assert get_data(since=full["cursor"])["messages"] == []
+
+    post([message(i) for i in range(5)])
+    delta = get_data(since=full["cursor"])
+    assert [m["sms"] for m in delta["messages"]] == ["Code 4", "Code 3"]
+    assert delta["cursor"] == full["cursor"] + 2
+    assert delta["oldest_id"] == full["oldest_id"]
+    assert [m["sms"] for m in get_data(since=full["cursor"], app_name="Other")["messages"]] == []
+
+
+def test_since_cursor_goes_back_after_a_reset():
+    post([message(1)])
+    cursor = get_data()["cursor"]
+    # The client's cursor is from before the data was reset
+    assert get_data(since=cursor + 100)["cursor"] == cursor
+
+
+def test_keyset_pages_cover_every_message_once():
+    post([message(i, app_name="Acme" if i % 2 else "Beta") for i in range(7)])
+    pages = []
+    before_id = None
+    while True:
+        params = {"limit": 2} if before_id is None else {"limit": 2, "before_id": before_id}
+        page = get_data(**params)
+        pages.append([m["sms"] for m in page["messages"]])
+        before_id = page["next_before_id"]
+        if before_id is None:
+            break
+    assert pages == [["Code 6", "Code 5"], ["Code 4", "Code 3"], ["Code 2", "Code 1"], ["Code 0"]]
+
+
+def test_pages_filter_by_app_name_and_carrier():
+    post([message(i, app_name="Acme" if i % 2 else "Beta") for i in range(7)])
+    assert [m["sms"] for m in get_data(app_name="Beta")["messages"]] == ["Code 6", "Code 4", "Code 2", "Code 0"]
+    assert [m["sms"] for m in get_data(carrier=message(3)["carrier"])["messages"]] == ["Code 3"]
+    assert [m["sms"] for m in get_data(app_name="Beta", limit=3)["messages"]] == ["Code 6", "Code 4", "Code 2"]
+
+
+def test_page_limit_is_validated():
+    assert client.get("/api/console-data", params={"limit": 0}).status_code == 422
+    assert client.get("/api/console-data", params={"limit": main.MESSAGE_PAGE_MAX + 1}).status_code == 422
+
+
+@pytest.mark.parametrize("path", ["/api/console-data", "/api/origins"])
+def test_unchanged_data_gets_not_modified(path):
+    post([message(1)])
+    first = client.get(path)
+    etag = first.headers["etag"]
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b""
+    assert client.get(path, headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    post([message(2, app_name="Beta")])
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+
+
+def test_each_encoding_has_its_own_etag():
+    # Large enough to be compressed
+    post([message(i) for i in range(40)])
+    plain = client.get("/api/console-data", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/api/console-data", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in plain.headers
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert gzipped.json() == plain.json()
+
+    # A cached identity body is not a match for a gzip request
+    revalidated = client.get("/api/console-data", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]
+    })
+    assert revalidated.status_code == 200
+    assert client.get("/api/console-data", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]
+    }).status_code == 304
+
+
+def test_small_bodies_are_not_compressed():
+    post([message(1)])
+    response = client.get("/api/console-data", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_negotiate_encoding():
+    preferred = CONTENT_ENCODINGS[0]
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("GZIP;q=0.5") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("gzip;q=bad") is None
+    assert negotiate_encoding("*") == preferred
+    assert negotiate_encoding("gzip, *;q=0") == "gzip"
+    assert negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert negotiate_encoding("br, gzip;q=0.5") == preferred
+
+
+def test_crawl_jobs_are_queued_and_claimed_once():
+    post([message(1), message(2, app_name="Beta")])
+    with SessionLocal() as db:
+        assert enqueue_crawl_jobs(db) == 2
+        # Both origins already have a job in flight
+        assert enqueue_crawl_jobs(db) == 0
+        acme, beta = sorted((claim_crawl_job(db), claim_crawl_job(db)), key=lambda job: job.app_name)
+        assert (acme.app_name, beta.app_name) == ("Acme", "Beta")
+        assert claim_crawl_job(db) is None
+
+        save_crawl_results(db, [CrawlResult(acme, "https://acme.example/login"), CrawlResult(beta)])
+        assert dict(db.query(Origin.app_name, Origin.login_url)) == {"Acme": "https://acme.example/login", "Beta": None}
+        assert sorted(row[0] for row in db.query(CrawlJob.status)) == ["done", "done"]
+
+
+def test_concurrent_workers_claim_a_job_once():
+    post([message(1)])
+    with SessionLocal() as db:
+        enqueue_crawl_jobs(db)
+
+    def claim(_):
+        with SessionLocal() as db:
+            return claim_crawl_job(db)
+
+    with ThreadPoolExecutor(8) as pool:
+        claimed = [job for job in pool.map(claim, range(8)) if job is not None]
+    assert len(claimed) == 1
+
+
+def test_failed_crawls_are_retried_with_backoff(monkeypatch):
+    monkeypatch.setattr(main, "CRAWL_RETRY_SECONDS", 60)
+    monkeypatch.setattr(main, "CRAWL_MAX_ATTEMPTS", 3)
+    post([message(1)])
+    jobs = CrawlJob.__table__
+    outcomes = []
+    with SessionLocal() as db:
+        enqueue_crawl_jobs(db)
+        for attempt in range(3):
+            job = claim_crawl_job(db)
+            assert job.attempts == attempt
+            failed_at = datetime.utcnow()
+            save_crawl_results(db, [CrawlResult(job, error="timeout")])
+            # Not due again until the backoff is over
+            assert claim_crawl_job(db) is None
+            status, next_attempt_at, error = db.execute(
+                select(jobs.c.status, jobs.c.next_attempt_at, jobs.c.last_error)
+            ).one()
+            outcomes.append((status, round((next_attempt_at - failed_at).total_seconds() / 60), error))
+            # Skip the wait
+            db.execute(jobs.update().where(jobs.c.status == "queued").values(next_attempt_at=failed_at))
+            db.commit()
+    assert outcomes == [("queued", 1, "timeout"), ("queued", 2, "timeout"), ("failed", 0, "timeout")]
+
+
+def test_recently_crawled_origins_are_skipped(monkeypatch):
+    monkeypatch.setattr(main, "CRAWL_NOT_FOUND_TTL_HOURS", 0.5 / 3600)
+    post([message(1), message(2, app_name="Beta")])
+    with SessionLocal() as db:
+        enqueue_crawl_jobs(db)
+        acme, beta = sorted((claim_crawl_job(db), claim_crawl_job(db)), key=lambda job: job.app_name)
+        save_crawl_results(db, [CrawlResult(acme, "https://acme.example/login"), CrawlResult(beta)])
+        # Just crawled, only force queues them again
+        assert enqueue_crawl_jobs(db) == 0
+        time.sleep(0.6)
+        # A not found result goes stale sooner than a found one
+        assert enqueue_crawl_jobs(db) == 1
+        assert db.query(CrawlJob.app_name).filter(CrawlJob.status == "queued").scalar() == "Beta"
+        # Beta is already queued, force only adds Acme
+        assert enqueue_crawl_jobs(db, force=True) == 1
+
+
+@pytest.fixture
+def static_files(tmp_path, monkeypatch):
+    directory = tmp_path / "static"
+    directory.mkdir()
+    (directory / "index.html").write_text('<link rel="stylesheet" href="/static/app.css"><p>Console</p>')
+    (directory / "app.css").write_text(".card{margin:0;padding:4px}\n" * 100)
+    (tmp_path / "secret.txt").write_text("outside the static directory")
+    assets = main.StaticAssets(str(directory)).load_all()
+    monkeypatch.setattr(main, "static_assets", assets)
+    return directory
+
+
+def test_index_links_assets_by_version(static_files):
+    response = client.get("/")
+    assert response.headers["cache-control"] == "no-cache"
+    assert main.static_assets.url("app.css") in response.text
+    assert "?v=" in main.static_assets.url("app.css")
+
+
+def test_only_the_current_version_is_immutable(static_files):
+    versioned = client.get(main.static_assets.url("app.css"))
+    assert versioned.headers["cache-control"] == f"public, max-age={main.STATIC_MAX_AGE}, immutable"
+    assert versioned.headers["content-type"] == "text/css; charset=utf-8"
+    assert client.get("/static/app.css").headers["cache-control"] == "no-cache"
+    assert client.get("/static/app.css?v=old").headers["cache-control"] == "no-cache"
+
+
+def test_unchanged_asset_gets_not_modified(static_files):
+    first = client.get("/static/app.css", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    headers = {"Accept-Encoding": "gzip"}
+    assert client.get("/static/app.css", headers={**headers, "If-None-Match": first.headers["etag"]}).status_code == 304
+    unchanged = client.get("/static/app.css", headers={**headers, "If-Modified-Since": first.headers["last-modified"]})
+    assert unchanged.status_code == 304 and unchanged.headers["etag"] == first.headers["etag"]
+    older = client.get("/static/app.css", headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert older.status_code == 200
+    assert client.get("/static/app.css", headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+
+def test_head_sends_only_headers(static_files):
+    full = client.get("/static/app.css", headers={"Accept-Encoding": "identity"})
+    head = client.head("/static/app.css", headers={"Accept-Encoding": "identity"})
+    assert head.status_code == 200 and head.content == b""
+    assert head.headers["content-length"] == full.headers["content-length"]
+    assert head.headers["etag"] == full.headers["etag"]
+
+
+def test_paths_outside_the_directory_are_rejected(static_files):
+    assert main.static_assets.get("../secret.txt") is None
+    assert client.get("/static/..%2Fsecret.txt").status_code == 404
+    assert client.get("/static/missing.css").status_code == 404
+
+
+def test_dev_mode_reloads_edited_files(static_files, monkeypatch):
+    assets = main.StaticAssets(str(static_files), dev_mode=True).load_all()
+    monkeypatch.setattr(main, "static_assets", assets)
+    versioned_url = assets.url("app.css")
+    first = client.get(versioned_url)
+    # Never cached for long while editing
+    assert first.headers["cache-control"] == "no-cache"
+
+    css = static_files / "app.css"
+    css.write_text(".card{margin:1px}\n")
+    stat = os.stat(css)
+    os.utime(css, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    edited = client.get("/static/app.css")
+    assert edited.text == ".card{margin:1px}\n"
+    assert edited.headers["etag"] != first.headers["etag"]
+    # Deleted files are gone without a restart
+    css.unlink()
+    assert client.get("/static/app.css").status_code == 404
@@ -10,7 +10,7 @@ def check_main_py():
     
     checks = {
         "Message model exists": "class Message(Base):" in content,
-        "POST endpoint exists": '@app.post("/api/console-data")' in content,
+        "POST endpoint exists": '@app.post("/api/console-data"' in content,
         "GET endpoint exists": '@app.get("/api/console-data"' in content,
         "No login endpoint": '@app.post("/api/login")' not in content,
         "No refresh token endpoint": '@app.get("/api/refresh-token")' not in content,